@@ -1,17 +1,24 @@
 # Main Function for CETI ~ CH3X/CarsonB
-from PyQt5 import QtWidgets
-from gui.overlay import Overlay
-from core.monitor import JournalMonitor
-from core.edsm import check_system_on_edsm
-from core.edastro import check_system_on_edastro
-from core.constants import EDSM_SYSTEM_URL, EDASTRO_API_URL, SPANSH_SYSTEM_URL
-from config.style import APP_STYLE
-import datetime
+import time
+STARTUP_T0 = time.perf_counter()
+
+import argparse, os, sys
+from core.lookup import LookupEngine, PROVIDERS, summarize
+from core import client
+from core.cache import StatusCache
+from core.history import VisitHistory
+from core.metrics import METRICS
+from core.breaker import breaker_states
+from core.id64 import decode as decode_address
+from core.constants import EDSM_SYSTEM_URL, EDASTRO_API_URL, SPANSH_SYSTEM_URL, VERSION, TARGET_DEBOUNCE_MS, METRICS_PORT, LOOKUP_DEADLINE_MS
 
 last_queried_system = None
+current_lookup = None
+startup_marks = {}
 
 def on_new_system(system_name, system_address):
-    global last_queried_system
+    global last_queried_system, current_lookup
+    startup_mark("event")
     system_name = system_name.strip()
     if system_name == last_queried_system:
         return
@@ -19,30 +26,9 @@ def on_new_system(system_name, system_address):
 
     print(f"[CETI] New system: {system_name}")
 
-    overlay.loading_active = True
-    overlay.update_display(system_name, False, None)
-
-    edsm_start = datetime.datetime.now()
-    edsm_visited, _, edsm_status = check_system_on_edsm(system_name)
-    edsm_elapsed = datetime.datetime.now() - edsm_start
-    edsm_ms = int(edsm_elapsed.total_seconds() * 1000)
-
-    edastro_start = datetime.datetime.now()
-    edastro_visited, _, edastro_status = check_system_on_edastro(system_name)
-    edastro_elapsed = datetime.datetime.now() - edastro_start
-    edastro_ms = int(edastro_elapsed.total_seconds() * 1000)
-
     spansh_url = SPANSH_SYSTEM_URL.format(str(system_address)) if system_address else None
-
-    print(f"  [EDSM]    {edsm_status} in {edsm_ms} ms")
-    print(f"  [Edastro] {edastro_status} in {edastro_ms} ms")
     print(f"  [Spansh]  {spansh_url or 'No Address'}")
 
-    overlay.loading_active = False
-
-    combined_timing = f"Response: {'Yes' if edsm_visited else 'No'} | {edsm_ms} ms"
-    visited = edsm_visited or edastro_visited
-
     urls = {
         "edsm": EDSM_SYSTEM_URL.format(system_name),
         "edastro": EDASTRO_API_URL.format(system_name)
@@ -50,7 +36,119 @@ def on_new_system(system_name, system_address):
     if spansh_url:
         urls["spansh"] = spansh_url
 
-    overlay.update_display(system_name, visited, None, timing_info=combined_timing, urls=urls)
+    current_lookup = {"system": system_name, "address": system_address, "urls": urls, "results": {},
+                      "estimate": decode_address(system_address), "started": time.perf_counter()}
+
+    overlay.loading_active = True
+    overlay.update_display(system_name, False, None, timing_info=format_timing(current_lookup["results"]),
+                           estimate=current_lookup["estimate"])
+
+    # Local answers render immediately; network lookups wait until the target settles,
+    # so flicking through the galaxy map only queries the system you stop on
+    deadline_timer.stop()
+    if engine.lookup_local(system_name, system_address):
+        lookup_timer.stop()
+    else:
+        lookup_timer.start(TARGET_DEBOUNCE_MS)
+    show_cache_stats()
+
+def run_pending_lookup():
+    if current_lookup is not None and not current_lookup["results"]:
+        deadline_timer.start(LOOKUP_DEADLINE_MS)
+        engine.lookup(current_lookup["system"], current_lookup["address"], skip_local=True)
+
+def on_lookup_deadline():
+    # Stop waiting on slow providers; anything that still arrives is shown as it comes
+    if current_lookup is None or "finished" in current_lookup:
+        return
+    print(f"  [CETI] Deadline reached after {LOOKUP_DEADLINE_MS} ms")
+    METRICS.count("ceti_lookup_deadline_total")
+    current_lookup["expired"] = True
+    render_lookup()
+
+def show_cache_stats():
+    stats = cache.stats()
+    print(f"  [Cache]   {stats['hits']} hits / {stats['misses']} misses")
+    overlay.tray_icon.setToolTip(f"CETI {VERSION}\nCache: {stats['hits']} hits / {stats['misses']} misses ({stats['hit_rate']:.0%})")
+
+def on_provider_result(result):
+    # Providers report independently, so render whatever has arrived so far
+    if current_lookup is None or result["system"] != current_lookup["system"]:
+        return
+
+    current_lookup["results"][result["provider"]] = result
+    if not result.get("cached"):
+        print(f"  [{result['provider'].upper()}] {result['status']} in {result['ms']} ms")
+    render_lookup()
+
+def lookup_settled(results):
+    # One "visited" (or our own history) is conclusive; "not visited" needs every provider
+    return ("history" in results or any(r["visited"] for r in results.values())
+            or all(provider in results for provider in PROVIDERS))
+
+def render_lookup():
+    results = current_lookup["results"]
+    settled = lookup_settled(results) or current_lookup.get("expired", False)
+    overlay.loading_active = not settled
+    visited = any(r["visited"] for r in results.values())
+    system_id, coords = merge_details(results)
+    render_start = time.perf_counter()
+    overlay.update_display(current_lookup["system"], visited, system_id,
+                           timing_info=format_timing(results, settled), urls=current_lookup["urls"], coords=coords,
+                           estimate=current_lookup["estimate"])
+    overlay.update_provider_health(breaker_states())
+    METRICS.observe("ceti_stage_ms", (time.perf_counter() - render_start) * 1000, stage="render")
+    if settled and "finished" not in current_lookup:
+        overlay.route_model.update_system(current_lookup["system"], *summarize(results))
+        current_lookup["finished"] = time.perf_counter()
+        deadline_timer.stop()
+        METRICS.observe("ceti_stage_ms", (current_lookup["finished"] - current_lookup["started"]) * 1000, stage="lookup")
+
+def merge_details(results):
+    # First id and coordinates any provider returned, so saving needs no second request
+    system_id, coords = None, None
+    for result in results.values():
+        details = result.get("details") or {}
+        system_id = system_id or details.get("id")
+        coords = coords or details.get("coords")
+    return system_id, coords
+
+def format_timing(results, settled=False):
+    if "history" in results:
+        first_visit = results["history"].get("first_visit") or ""
+        return f"Visited by you | first {first_visit[:10]}" if first_visit else "Visited by you"
+
+    if results and all(r["status"] == "filter" for r in results.values()):
+        return "Not in the EDSM dump | known-systems filter"
+
+    parts = []
+    for provider in PROVIDERS:
+        result = results.get(provider)
+        if result is None:
+            # Still running, or not needed once another provider confirmed the visit
+            parts.append(f"{provider.upper()}: {'-' if settled else '...'}")
+        elif result["status"] == "offline":
+            parts.append(f"{provider.upper()}: offline")
+        elif result["status"] == "throttled":
+            parts.append(f"{provider.upper()}: rate limited")
+        elif result["visited"] is None:
+            parts.append(f"{provider.upper()}: error | {result['ms']} ms")
+        else:
+            timing = "cached" if result.get("cached") else f"{result['ms']} ms"
+            parts.append(f"{provider.upper()}: {'Yes' if result['visited'] else 'No'} | {timing}")
+    return " · ".join(parts)
+
+def on_system_visited(visit):
+    history.record(visit["address"], visit["name"], visit["pos"], visit["timestamp"])
+    # Scan events carry no StarPos; the address still places us within a boxel
+    overlay.set_position(tuple(visit["pos"]) if visit["pos"] else decode_address(visit["address"]))
+
+def on_route_plotted(route):
+    if route:
+        print(f"[CETI] Route plotted: {len(route)} jumps, prefetching")
+    # Hops of the previous route may already be queued; the overlay drops any not of this generation
+    generation = engine.prefetch(route, bridge.emit_progress, bridge.emit_hop)
+    overlay.set_route(route, generation)
 
 def on_galmap_open():
     if overlay.visibility_tied_to_map:
@@ -62,23 +160,108 @@ def on_galmap_close():
     if overlay.visibility_tied_to_map:
         overlay.hide()
 
-app = QtWidgets.QApplication([])
-app.setStyleSheet(APP_STYLE)
+def start_services():
+    # Everything that isn't needed to put the tray icon and overlay on screen starts here,
+    # once the event loop is running
+    global bridge, cache, history, engine, lookup_timer, deadline_timer, monitor
+    from PyQt5 import QtCore
+    from gui.bridge import LookupBridge
+    from core.monitor import JournalMonitor
+    overlay.init_store()
+
+    bridge = LookupBridge()
+    bridge.provider_result.connect(on_provider_result)
+    bridge.prefetch_progress.connect(overlay.update_route_progress)
+    bridge.prefetch_hop.connect(overlay.update_route_hop)
+    cache = StatusCache()
+    history = VisitHistory()
+    history.backfill_async()
+    engine = LookupEngine(bridge.emit_result, cache=cache, history=history)
+    engine.executor.submit(client.preload)
+    lookup_timer = QtCore.QTimer()
+    lookup_timer.setSingleShot(True)
+    lookup_timer.timeout.connect(run_pending_lookup)
+    deadline_timer = QtCore.QTimer()
+    deadline_timer.setSingleShot(True)
+    deadline_timer.timeout.connect(on_lookup_deadline)
+
+    monitor = JournalMonitor()
+    monitor.new_targeted_system.connect(on_new_system)
+    monitor.galmap_opened.connect(on_galmap_open)
+    monitor.galmap_closed.connect(on_galmap_close)
+    monitor.system_visited.connect(on_system_visited)
+    monitor.route_plotted.connect(on_route_plotted)
+    monitor.journal_opened.connect(lambda: startup_mark("monitor"))
+    monitor.start()
+    if METRICS_PORT:
+        METRICS.serve(METRICS_PORT)
+    startup_mark("services")
+
+def stop_services():
+    monitor.stop()
+    monitor.wait()
+    engine.shutdown()
+    client.close_all()
+    cache.close()
+    history.close()
+    overlay.close_store()
+
+def startup_mark(stage):
+    # Milestones for bench/startup.py, which sets CETI_STARTUP_BENCH to a file path
+    if stage in startup_marks:
+        return
+    ms = (time.perf_counter() - STARTUP_T0) * 1000
+    startup_marks[stage] = ms
+    print(f"[Startup] {stage} ready in {ms:.0f} ms")
+    bench_file = os.environ.get("CETI_STARTUP_BENCH")
+    if bench_file:
+        with open(bench_file, "a", encoding="utf-8") as f:
+            f.write(f"{stage} {ms:.1f}\n")
+        if stage == "event":
+            from PyQt5 import QtWidgets
+            QtWidgets.QApplication.quit()
+
+def run_gui(qt_args):
+    global overlay
+    # Qt is only imported here so --check runs on machines without PyQt or a display
+    from PyQt5 import QtWidgets, QtCore
+    from gui.overlay import Overlay
+    from config.style import APP_STYLE
+
+    app = QtWidgets.QApplication([sys.argv[0]] + qt_args)
+    app.setStyleSheet(APP_STYLE)
+
+    overlay = Overlay()
+    if overlay.visibility_tied_to_map:
+        overlay.hide()
+    else:
+        overlay.show()
+    startup_mark("tray")
 
-overlay = Overlay()
-if overlay.visibility_tied_to_map:
-    overlay.hide()
-else:
-    overlay.show()
+    QtCore.QTimer.singleShot(0, start_services)
+    app.exec_()
+    stop_services()
 
-monitor = JournalMonitor()
-monitor.new_targeted_system.connect(on_new_system)
-monitor.galmap_opened.connect(on_galmap_open)
-monitor.galmap_closed.connect(on_galmap_close)
+def main():
+    parser = argparse.ArgumentParser(prog="CETI", description=f"CETI {VERSION}")
+    parser.add_argument("--check", metavar="FILE", help="check system names from FILE ('-' for stdin) without the overlay")
+    parser.add_argument("--route", metavar="FILE", help="annotate a Spansh route export (CSV or JSON) with visited status")
+    parser.add_argument("--out", default=None,
+                        help="--check: JSON lines output (default: stdout); --route: annotated route (default: FILE.ceti.csv/.jsonl)")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent lookups for --check and --route")
+    parser.add_argument("--no-cache", action="store_true", help="ignore and don't update the local cache")
+    args, qt_args = parser.parse_known_args()
 
-monitor.start()
+    if args.check:
+        from core.batch import run_batch
+        run_batch(args.check, args.out or "-", workers=args.workers, use_cache=not args.no_cache)
+    elif args.route:
+        from core.spansh import run_route
+        run_route(args.route, args.out, workers=args.workers, use_cache=not args.no_cache)
+    else:
+        run_gui(qt_args)
 
-app.exec_()
-monitor.stop()
-monitor.wait()
-overlay.csv_file_handle.close()
+if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()  # journal backfill uses a process pool, also inside the frozen exe
+    main()
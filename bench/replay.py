@@ -0,0 +1,155 @@
+# End-to-end latency benchmark ~ python bench/replay.py [Journal.*.log ...] --speed 4 --latency-ms 80
+# Replays journal events into a temporary journal directory while CETI runs headless
+# against bench/stub_server.py, and reports FSDTarget-to-update_display latency.
+import argparse, datetime, json, os, shutil, statistics, sys, tempfile, threading, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from bench.stub_server import start_stub_server, add_stub_arguments, config_from_args
+
+def parse_timestamp(line):
+    try:
+        stamp = json.loads(line).get("timestamp", "")
+        return datetime.datetime.strptime(stamp, "%Y-%m-%dT%H:%M:%SZ").timestamp()
+    except ValueError:
+        return None
+
+def load_journals(paths):
+    lines = []
+    for path in paths:
+        with open(path, "rb") as f:
+            lines.extend(line.rstrip(b"\r\n") for line in f if line.strip())
+    return lines
+
+def synthetic_journal(count, spacing_s=2):
+    start = datetime.datetime(2024, 1, 1)
+    lines = []
+    for i in range(count):
+        stamp = (start + datetime.timedelta(seconds=i * spacing_s)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        lines.append(json.dumps({"timestamp": stamp, "event": "Scan", "BodyName": f"Noise {i}", "StarSystem": "Noise"}))
+        lines.append(json.dumps({"timestamp": stamp, "event": "FSDTarget", "Name": f"Bench Sector AB-C d{i}",
+                                 "SystemAddress": 1000 + i, "StarClass": "M"}))
+    return [line.encode("utf-8") for line in lines]
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay journals through CETI against a stub provider server")
+    parser.add_argument("journals", nargs="*", help="recorded Journal.*.log files (default: synthetic events)")
+    parser.add_argument("--synthetic", type=int, default=50, help="number of synthetic FSDTarget events")
+    parser.add_argument("--speed", type=float, default=4, help="replay speed multiplier; 0 replays as fast as possible")
+    parser.add_argument("--gui", action="store_true", help="use the real display instead of offscreen Qt")
+    parser.add_argument("--drain-s", type=float, default=15, help="how long to wait for lookups after the last event")
+    parser.add_argument("--budget-p95", type=float, default=None, help="fail if p95 latency exceeds this many ms")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    # Journals are read before CETI runs inside the temporary directory, so relative paths work
+    lines = load_journals(args.journals) if args.journals else synthetic_journal(args.synthetic)
+    workdir = tempfile.mkdtemp(prefix="ceti-replay-")
+    try:
+        replay_run(args, lines, workdir)
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def replay_run(args, lines, workdir):
+    journal_dir = os.path.join(workdir, "journal")
+    os.mkdir(journal_dir)
+    journal_path = os.path.join(journal_dir, "Journal.2024-01-01T000000.01.log")
+    open(journal_path, "wb").close()
+
+    server, base_url = start_stub_server(config_from_args(args))
+    # Must be set before CETI's modules read core.constants
+    os.environ.update(CETI_JOURNAL_DIR=journal_dir, CETI_EDSM_HOST=base_url, CETI_EDASTRO_HOST=base_url)
+    if not args.gui:
+        os.environ["QT_QPA_PLATFORM"] = "offscreen"
+    os.chdir(workdir)
+
+    from PyQt5 import QtWidgets, QtCore
+    import CETI
+    from gui.overlay import Overlay
+    from core.events import event_name
+    from core.metrics import METRICS
+
+    app = QtWidgets.QApplication([])
+    CETI.overlay = overlay = Overlay()
+
+    written = {}
+    latencies = []
+    lock = threading.Lock()
+    update_display = overlay.update_display
+
+    def timed_update_display(system_name, *a, **kw):
+        update_display(system_name, *a, **kw)
+        if not overlay.loading_active:
+            with lock:
+                started = written.pop(system_name, None)
+            if started is not None:
+                latencies.append((time.perf_counter() - started) * 1000)
+
+    overlay.update_display = timed_update_display
+    state = {"done": False, "finished_at": None}
+
+    def replay():
+        previous = None
+        with open(journal_path, "ab") as journal:
+            for line in lines:
+                stamp = parse_timestamp(line)
+                if args.speed and stamp is not None and previous is not None and stamp > previous:
+                    time.sleep((stamp - previous) / args.speed)
+                previous = stamp if stamp is not None else previous
+                if event_name(line) == b"FSDTarget":
+                    name = json.loads(line).get("Name", "").strip()
+                    with lock:
+                        written[name] = time.perf_counter()
+                journal.write(line + b"\n")
+                journal.flush()
+        state["done"] = True
+        state["finished_at"] = time.perf_counter()
+
+    def start_replay():
+        threading.Thread(target=replay, name="replay", daemon=True).start()
+
+    def check_finished():
+        if not state["done"]:
+            return
+        with lock:
+            outstanding = len(written)
+        if outstanding == 0 or time.perf_counter() - state["finished_at"] > args.drain_s:
+            app.quit()
+
+    def begin():
+        CETI.start_services()
+        CETI.monitor.journal_opened.connect(start_replay)
+
+    poll = QtCore.QTimer()
+    poll.timeout.connect(check_finished)
+    poll.start(50)
+    QtCore.QTimer.singleShot(0, begin)
+    app.exec_()
+    CETI.stop_services()
+    server.shutdown()
+
+    targets = sum(1 for line in lines if event_name(line) == b"FSDTarget")
+    print()
+    print(f"FSDTarget events replayed: {targets}")
+    print(f"Displayed:                 {len(latencies)}")
+    print(f"Superseded / unresolved:   {targets - len(latencies)}")
+    print(f"Stub requests:             {server.config.requests} ({server.config.rejected} rate limited)")
+    if latencies:
+        print(f"FSDTarget -> update_display latency (ms): "
+              f"p50={percentile(latencies, 50):.0f} p95={percentile(latencies, 95):.0f} "
+              f"p99={percentile(latencies, 99):.0f} max={max(latencies):.0f} mean={statistics.mean(latencies):.0f}")
+    print()
+    for line in METRICS.summary_lines():
+        print(f"  {line}")
+
+    if args.budget_p95 is not None and (not latencies or percentile(latencies, 95) > args.budget_p95):
+        print(f"\nBudget exceeded: p95 > {args.budget_p95:.0f} ms")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# Startup benchmark ~ python bench/startup.py [--runs 5] [--exe dist/CETI/CETI.exe]
+# Launches CETI against an empty temporary journal directory, writes one FSDTarget
+# once the journal monitor is up, and reports time-to-tray / time-to-first-journal-event.
+import argparse, json, os, statistics, subprocess, sys, tempfile, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STAGES = ("tray", "services", "monitor", "event")
+
+def read_marks(path):
+    marks = {}
+    if os.path.isfile(path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                stage, ms = line.split()
+                marks[stage] = float(ms)
+    return marks
+
+def run_once(command, offscreen, timeout):
+    with tempfile.TemporaryDirectory(prefix="ceti-bench-") as workdir:
+        journal_dir = os.path.join(workdir, "journal")
+        os.mkdir(journal_dir)
+        journal = os.path.join(journal_dir, "Journal.2024-01-01T000000.01.log")
+        with open(journal, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"timestamp": "2024-01-01T00:00:00Z", "event": "Fileheader"}) + "\n")
+
+        marks_file = os.path.join(workdir, "marks.txt")
+        env = dict(os.environ, CETI_JOURNAL_DIR=journal_dir, CETI_STARTUP_BENCH=marks_file)
+        if offscreen:
+            env["QT_QPA_PLATFORM"] = "offscreen"
+
+        launched = time.perf_counter()
+        process = subprocess.Popen(command, cwd=workdir, env=env,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        wall = {}
+        target_written = False
+        try:
+            while time.perf_counter() - launched < timeout:
+                marks = read_marks(marks_file)
+                for stage in marks:
+                    wall.setdefault(stage, (time.perf_counter() - launched) * 1000)
+                if "monitor" in marks and not target_written:
+                    with open(journal, "a", encoding="utf-8") as f:
+                        f.write(json.dumps({"timestamp": "2024-01-01T00:00:01Z", "event": "FSDTarget",
+                                            "Name": "Sol", "SystemAddress": 10477373803}) + "\n")
+                    target_written = True
+                if "event" in marks or process.poll() is not None:
+                    break
+                time.sleep(0.005)
+        finally:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        return wall
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure CETI time-to-tray and time-to-first-journal-event")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--exe", help="benchmark a built executable instead of CETI.py")
+    parser.add_argument("--gui", action="store_true", help="use the real display instead of offscreen Qt")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--budget-tray", type=float, default=1500, help="median ms allowed until the tray is up")
+    parser.add_argument("--budget-event", type=float, default=3000, help="median ms allowed until the first FSDTarget is handled")
+    args = parser.parse_args()
+
+    command = [args.exe] if args.exe else [sys.executable, os.path.join(ROOT, "CETI.py")]
+    runs = []
+    for i in range(args.runs):
+        wall = run_once(command, not args.gui, args.timeout)
+        runs.append(wall)
+        print(f"run {i + 1}: " + ", ".join(f"{stage} {wall[stage]:.0f} ms" for stage in STAGES if stage in wall))
+
+    print()
+    print(f"{'stage':<10}{'median':>10}{'min':>10}{'max':>10}   (wall clock from launch, {len(runs)} runs)")
+    medians = {}
+    for stage in STAGES:
+        values = [run[stage] for run in runs if stage in run]
+        if not values:
+            print(f"{stage:<10}{'n/a':>10}")
+            continue
+        medians[stage] = statistics.median(values)
+        print(f"{stage:<10}{medians[stage]:>10.0f}{min(values):>10.0f}{max(values):>10.0f}")
+
+    over_budget = []
+    if medians.get("tray", float("inf")) > args.budget_tray:
+        over_budget.append(f"tray > {args.budget_tray:.0f} ms")
+    if medians.get("event", float("inf")) > args.budget_event:
+        over_budget.append(f"first event > {args.budget_event:.0f} ms")
+    print()
+    print("Budget: " + ("exceeded (" + ", ".join(over_budget) + ")" if over_budget else "ok"))
+    sys.exit(1 if over_budget else 0)
+
+if __name__ == "__main__":
+    main()
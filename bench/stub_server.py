@@ -0,0 +1,143 @@
+# Stub EDSM/EDASTRO server ~ python bench/stub_server.py --port 8765 --latency-ms 80 --error-rate 0.05
+# Point CETI at it with CETI_EDSM_HOST / CETI_EDASTRO_HOST=http://127.0.0.1:<port>
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from collections import deque
+import argparse, hashlib, json, random, threading, time
+
+class StubConfig:
+    def __init__(self, latency_ms=50, jitter_ms=20, error_rate=0.0, timeout_rate=0.0, hang_s=30, visited_rate=0.5,
+                 rate_limit=720, rate_window_s=3600, down=()):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.hang_s = hang_s
+        self.visited_rate = visited_rate
+        self.rate_limit = rate_limit
+        self.rate_window_s = rate_window_s
+        self.down = set(down)
+        self.requests = 0
+        self.rejected = 0
+        self.windows = {}
+        self.lock = threading.Lock()
+
+    def admit(self, api):
+        # Sliding-window limit per API, like EDSM: returns (allowed, remaining, reset seconds)
+        now = time.monotonic()
+        with self.lock:
+            window = self.windows.setdefault(api, deque())
+            while window and now - window[0] > self.rate_window_s:
+                window.popleft()
+            allowed = len(window) < self.rate_limit
+            if allowed:
+                window.append(now)
+            else:
+                self.rejected += 1
+            reset = self.rate_window_s - (now - window[0]) if window else 0
+            return allowed, self.rate_limit - len(window), max(1, int(reset))
+
+def fake_system(name, visited_rate):
+    # Deterministic per name, so EDSM and EDASTRO agree and repeated runs are comparable
+    digest = hashlib.blake2b(name.lower().encode("utf-8"), digest_size=8).digest()
+    value = int.from_bytes(digest, "little")
+    if (value % 10000) / 10000 >= visited_rate:
+        return None
+    coords = {axis: ((value >> shift) % 2000000) / 32 - 30000 for axis, shift in (("x", 8), ("y", 24), ("z", 40))}
+    return {"name": name, "id": value % 100000000, "coords": coords}
+
+def make_handler(config):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True  # headers and body go out separately; avoid delayed-ACK stalls
+
+        def do_GET(self):
+            config.requests += 1
+            url = urlparse(self.path)
+            api = "edastro" if url.path.startswith("/api/") else "edsm"
+            self.limits = config.admit(api)
+            if not self.limits[0]:
+                return self.reply(429, {"error": "rate limited"})
+            if api in config.down:
+                time.sleep(config.latency_ms / 1000)
+                return self.reply(503, {"error": "down"})
+
+            roll = random.random()
+            if roll < config.timeout_rate:
+                time.sleep(config.hang_s)
+            delay = max(0, config.latency_ms + random.uniform(-config.jitter_ms, config.jitter_ms))
+            time.sleep(delay / 1000)
+            if roll < config.timeout_rate + config.error_rate:
+                return self.reply(500, {"error": "injected"})
+
+            query = parse_qs(url.query)
+            if url.path == "/api-v1/systems":
+                names = query.get("systemName", []) + query.get("systemName[]", [])
+                systems = [s for s in (fake_system(n, config.visited_rate) for n in names) if s]
+                return self.reply(200, systems)
+            if url.path == "/api/starsystem":
+                system = fake_system(query.get("q", [""])[0], config.visited_rate)
+                return self.reply(200, {"name": system["name"]} if system else {})
+            if url.path == "/api-v1/sphere-systems":
+                x, y, z = (float(query.get(axis, ["0"])[0]) for axis in "xyz")
+                systems = [{"name": f"Stub {i}", "id": i, "distance": i * 1.5,
+                            "coords": {"x": x + i, "y": y, "z": z}} for i in range(1, 20)]
+                return self.reply(200, systems)
+            self.reply(404, {})
+
+        def reply(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            _, remaining, reset = self.limits
+            self.send_header("x-rate-limit-limit", str(config.rate_limit))
+            self.send_header("x-rate-limit-remaining", str(remaining))
+            self.send_header("x-rate-limit-reset", str(reset))
+            if status == 429:
+                self.send_header("Retry-After", str(min(reset, 5)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+def start_stub_server(config=None, port=0, host="127.0.0.1"):
+    # Returns (server, base_url); the server runs on a daemon thread
+    config = config or StubConfig()
+    server = ThreadingHTTPServer((host, port), make_handler(config))
+    server.daemon_threads = True
+    server.config = config
+    threading.Thread(target=server.serve_forever, name="stub-server", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+def add_stub_arguments(parser):
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--jitter-ms", type=float, default=20)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with HTTP 500")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="fraction of requests that hang for --hang-s")
+    parser.add_argument("--hang-s", type=float, default=30)
+    parser.add_argument("--visited-rate", type=float, default=0.5)
+    parser.add_argument("--rate-limit", type=int, default=720, help="requests per --rate-window-s before HTTP 429")
+    parser.add_argument("--rate-window-s", type=float, default=3600)
+    parser.add_argument("--down", action="append", default=[], choices=("edsm", "edastro"),
+                        help="answer every request to this API with HTTP 503")
+
+def config_from_args(args):
+    return StubConfig(args.latency_ms, args.jitter_ms, args.error_rate, args.timeout_rate, args.hang_s, args.visited_rate,
+                      args.rate_limit, args.rate_window_s, args.down)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub EDSM/EDASTRO server for CETI benchmarks")
+    parser.add_argument("--port", type=int, default=8765)
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+    server, base_url = start_stub_server(config_from_args(args), args.port)
+    print(f"Stub server on {base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
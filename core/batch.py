@@ -0,0 +1,162 @@
+# Headless batch checking ~ CETI --check systems.txt --out results.jsonl
+# No Qt here: names stream in, go through the same cache/history/providers as the
+# overlay, and one JSON line per system is written as soon as it is resolved.
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
+import json, sys, time
+from core.cache import normalize_name
+from core.lookup import PROVIDERS, BULK_PROVIDERS, query_provider, verdict
+from core.scheduler import priority, BATCH
+from core.bloom import definitely_unknown
+
+BATCH_SIZE = 200
+
+def read_names(source):
+    stream = sys.stdin if source == "-" else open(source, encoding="utf-8")
+    try:
+        for line in stream:
+            name = " ".join(line.split())
+            if name and not name.startswith("#"):
+                yield name
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+def make_record(system_name, visited, source, results, first_visit=None):
+    record = {"system": system_name, "visited": visited, "source": source}
+    for result in results.values():
+        details = result.get("details") or {}
+        record.setdefault("id", details.get("id"))
+        if details.get("coords"):
+            record["coords"] = list(details["coords"])
+            break
+    if first_visit:
+        record["first_visit"] = first_visit
+    record["providers"] = {provider: {"visited": r["visited"], "status": r["status"]} for provider, r in results.items()}
+    return record
+
+class BatchChecker:
+    def __init__(self, out=None, cache=None, history=None, workers=8, batch_size=BATCH_SIZE):
+        self.out = out
+        self.cache = cache
+        self.history = history
+        self.workers = workers
+        self.batch_size = batch_size
+        self.seen = set()
+        self.counts = {"checked": 0, "visited": 0, "not_visited": 0, "unknown": 0, "local": 0, "duplicates": 0}
+
+    def run(self, names):
+        names = iter(names)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="CETI-batch") as pool:
+            # Pulling one batch at a time keeps memory flat however long the input is
+            for batch in iter(lambda: list(islice(names, self.batch_size)), []):
+                self._run_batch(pool, batch)
+                elapsed = time.perf_counter() - start
+                print(f"[Batch] {self.counts['checked']:,} checked "
+                      f"({self.counts['checked'] / elapsed if elapsed else 0:,.0f}/s)", file=sys.stderr)
+        return self.counts
+
+    def _run_batch(self, pool, batch):
+        fresh = []
+        for name in batch:
+            key = normalize_name(name)
+            if key in self.seen:
+                self.counts["duplicates"] += 1
+                continue
+            self.seen.add(key)
+            fresh.append(name)
+        for record in self.resolve(pool, fresh):
+            self._write(record)
+
+    def resolve(self, pool, names):
+        # Yields one record per name: local answers first, then network answers as they land
+        remaining = []
+        for name in names:
+            record = self._lookup_local(name)
+            if record is not None:
+                self.counts["local"] += 1
+                yield record
+            else:
+                remaining.append(name)
+        if not remaining:
+            return
+
+        # Bulk providers answer the whole batch in a few requests; the rest go per system
+        with priority(BATCH):
+            bulk = {provider: check_many(remaining) for provider, check_many in BULK_PROVIDERS.items()}
+        futures = [pool.submit(self._resolve, name, bulk) for name in remaining]
+        for future in as_completed(futures):
+            yield future.result()
+
+    def _lookup_local(self, system_name):
+        if self.history is not None:
+            visit = self.history.lookup(system_name, None)
+            if visit is not None:
+                results = {"history": {"visited": True, "status": "local", "details": {"id": None, "coords": visit["coords"]}}}
+                return make_record(system_name, True, "history", results, visit["first_visit"])
+        if self.cache is not None:
+            entry = self.cache.get(system_name)
+            if entry is not None:
+                return make_record(system_name, entry["visited"], "cache", entry["results"])
+        if definitely_unknown(system_name):
+            return make_record(system_name, False, "filter", {})
+        return None
+
+    def _resolve(self, system_name, bulk):
+        results = {}
+        for provider, check in PROVIDERS.items():
+            if system_name in bulk.get(provider, {}):
+                visited, details, status = bulk[provider][system_name]
+                results[provider] = {"visited": visited, "status": status, "details": details}
+            else:
+                with priority(BATCH):
+                    result = query_provider(provider, check, system_name)
+                results[provider] = {"visited": result["visited"], "status": result["status"], "details": result["details"]}
+            if results[provider]["visited"]:
+                break  # one "visited" is conclusive; skip the remaining providers
+
+        visited = verdict(results)
+        if visited is not None and self.cache is not None:
+            self.cache.put(system_name, None, visited, results)
+        return make_record(system_name, visited, "network", results)
+
+    def _write(self, record):
+        self.counts["checked"] += 1
+        key = {True: "visited", False: "not_visited"}.get(record["visited"], "unknown")
+        self.counts[key] += 1
+        self.out.write(json.dumps(record) + "\n")
+        self.out.flush()
+
+def run_batch(source, out_path="-", workers=8, use_cache=True):
+    from core.cache import StatusCache
+    from core.history import VisitHistory
+    from core import client
+
+    # Results own stdout when writing there, so route CETI's log lines to stderr
+    stdout = sys.stdout
+    if out_path == "-":
+        out, sys.stdout = stdout, sys.stderr
+    else:
+        out = open(out_path, "a", encoding="utf-8")
+
+    cache = StatusCache() if use_cache else None
+    history = VisitHistory() if use_cache else None
+    start = time.perf_counter()
+    try:
+        counts = BatchChecker(out, cache=cache, history=history, workers=workers).run(read_names(source))
+    finally:
+        client.close_all()
+        for store in (cache, history):
+            if store is not None:
+                store.close()
+        if out is stdout:
+            sys.stdout = stdout
+        else:
+            out.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"[Batch] Done: {counts['checked']:,} systems in {elapsed:.1f}s | {counts['visited']:,} visited, "
+          f"{counts['not_visited']:,} not visited, {counts['unknown']:,} unknown | "
+          f"{counts['local']:,} answered locally, {counts['duplicates']:,} duplicates skipped", file=sys.stderr)
+    return counts
@@ -0,0 +1,245 @@
+# Bloom filter of systems known to EDSM ~ python -m core.bloom build [dump | --from-db]
+# Lives in one memory-mapped file, so opening it costs nothing and a lookup is a handful
+# of byte reads. A miss means the system is definitely not in the dump it was built from.
+import argparse, math, mmap, os, struct, threading, time
+from core.constants import BLOOM_FILE, BLOOM_FALSE_POSITIVE_RATE, BLOOM_MAX_AGE, GALAXY_DB_FILE, EDSM_DUMP_URL
+from core.galaxy import name_hash, open_dump, read_chunks, bounded_map
+
+MAGIC = b"CETIBLM1"
+HEADER = struct.Struct("<8sQIQd")  # magic, bits, hashes, systems added, built_at
+MASK64 = (1 << 64) - 1
+RELOAD_CHECK_INTERVAL = 60
+DEFAULT_CAPACITY = 200_000_000
+
+def mix(h):
+    # splitmix64 finalizer; turns the stored name hash into the second double-hashing value
+    h = ((h ^ (h >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    h = ((h ^ (h >> 27)) * 0x94D049BB133111EB) & MASK64
+    return h ^ (h >> 31)
+
+def probes(h, bits, hashes):
+    # Bit positions for one galaxy.name_hash value (Kirsch-Mitzenmacher double hashing)
+    h1 = h & MASK64
+    h2 = mix(h1) | 1
+    return [((h1 + i * h2) & MASK64) % bits for i in range(hashes)]
+
+def filter_size(capacity, fp_rate):
+    bits = max(64, math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2))
+    hashes = max(1, round(bits / capacity * math.log(2)))
+    return bits, hashes
+
+class BloomBuilder:
+    def __init__(self, capacity, fp_rate=BLOOM_FALSE_POSITIVE_RATE):
+        self.bits, self.hashes = filter_size(capacity, fp_rate)
+        nbytes = (self.bits + 7) // 8
+        try:
+            import numpy  # optional; only builds need it, and they run far faster with it
+            self.np = numpy
+            self.array = numpy.zeros(nbytes, dtype=numpy.uint8)
+        except ImportError:
+            self.np = None
+            self.array = bytearray(nbytes)
+        self.added = 0
+
+    def add_hashes(self, hashes):
+        # `hashes` are galaxy.name_hash values; numpy sets a whole chunk's bits at once
+        if not hashes:
+            return
+        self.added += len(hashes)
+        np = self.np
+        if np is None:
+            for h in hashes:
+                for pos in probes(h, self.bits, self.hashes):
+                    self.array[pos >> 3] |= 1 << (pos & 7)
+            return
+
+        h1 = np.asarray(hashes, dtype=np.int64).view(np.uint64)
+        h2 = h1 ^ (h1 >> np.uint64(30))
+        h2 = h2 * np.uint64(0xBF58476D1CE4E5B9)
+        h2 = (h2 ^ (h2 >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        h2 = (h2 ^ (h2 >> np.uint64(31))) | np.uint64(1)
+        bits = np.uint64(self.bits)
+        for i in range(self.hashes):
+            pos = (h1 + np.uint64(i) * h2) % bits
+            np.bitwise_or.at(self.array, pos >> np.uint64(3),
+                             np.left_shift(np.uint8(1), (pos & np.uint64(7)).astype(np.uint8)))
+
+    def save(self, path=BLOOM_FILE):
+        # Written next to the target and swapped in, so a running CETI never sees half a filter.
+        # Windows won't replace a file another process has mapped; that copy is swapped in on next start.
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, self.bits, self.hashes, self.added, time.time()))
+            f.write(self.array.tobytes() if self.np is not None else self.array)
+        try:
+            os.replace(temp_path, path)
+        except PermissionError:
+            os.replace(temp_path, path + ".new")
+            print(f"[Bloom] {path} is in use; the new filter will be used the next time CETI starts")
+
+class FilterUpdater:
+    # Sets bits for newly discovered systems in an existing filter file (delta syncs).
+    # Bits are only ever added, so a running CETI reading the same file never sees a false miss.
+    def __init__(self, path=BLOOM_FILE):
+        self.file = open(path, "r+b")
+        self.mm = mmap.mmap(self.file.fileno(), 0)
+        magic, self.bits, self.hashes, self.count, self.built_at = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC:
+            self.mm.close()
+            self.file.close()
+            raise ValueError(f"{path} is not a CETI known-systems filter")
+        self.added = 0
+
+    def add_hashes(self, hashes):
+        mm, offset = self.mm, HEADER.size
+        for h in hashes:
+            new = False
+            for pos in probes(h, self.bits, self.hashes):
+                index, bit = offset + (pos >> 3), 1 << (pos & 7)
+                if not mm[index] & bit:
+                    mm[index] |= bit
+                    new = True
+            self.added += new  # systems already in the filter (updated coordinates) aren't counted again
+
+    def close(self, built_at=None):
+        # `built_at` moves the filter's age forward when the caller knows it is complete up to then
+        HEADER.pack_into(self.mm, 0, MAGIC, self.bits, self.hashes, self.count + self.added,
+                         self.built_at if built_at is None else built_at)
+        self.mm.flush()
+        self.mm.close()
+        self.file.close()
+
+class KnownSystemsFilter:
+    def __init__(self, path=BLOOM_FILE):
+        self.path = path
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.bits, self.hashes, self.count, self.built_at = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC:
+            self.mm.close()
+            raise ValueError(f"{path} is not a CETI known-systems filter")
+        self.mtime = os.path.getmtime(path)
+
+    def might_contain(self, system_name):
+        mm, offset = self.mm, HEADER.size
+        for pos in probes(name_hash(system_name), self.bits, self.hashes):
+            if not mm[offset + (pos >> 3)] >> (pos & 7) & 1:
+                return False
+        return True
+
+    def age(self):
+        return time.time() - self.built_at
+
+    def close(self):
+        self.mm.close()
+
+_filter = None
+_filter_checked = 0.0
+_filter_lock = threading.Lock()
+
+def get_known_filter():
+    # Shared filter, reopened when `python -m core.bloom build` replaces the file.
+    # None when there is no filter, or it is too old for its misses to be trusted.
+    global _filter, _filter_checked
+    now = time.monotonic()
+    if not _filter_checked or now - _filter_checked >= RELOAD_CHECK_INTERVAL:
+        with _filter_lock:
+            if _filter is None and os.path.isfile(BLOOM_FILE + ".new"):
+                os.replace(BLOOM_FILE + ".new", BLOOM_FILE)
+            _filter_checked = now
+            try:
+                mtime = os.path.getmtime(BLOOM_FILE)
+            except OSError:
+                mtime = None
+            if mtime is not None and (_filter is None or mtime != _filter.mtime):
+                try:
+                    _filter = KnownSystemsFilter(BLOOM_FILE)
+                    print(f"[Bloom] {_filter.count:,} known systems, built {_filter.age() / 86400:.1f} days ago")
+                except (OSError, ValueError) as e:
+                    print(f"[Bloom] Could not open {BLOOM_FILE}: {e}")
+                    _filter = None
+    if _filter is None or _filter.age() > BLOOM_MAX_AGE:
+        return None
+    return _filter
+
+def definitely_unknown(system_name):
+    known = get_known_filter()
+    return known is not None and not known.might_contain(system_name)
+
+def hash_chunk(lines):
+    # Worker side of a dump build: just the name hashes, nothing else is kept
+    import json
+    hashes = []
+    for line in lines:
+        line = line.strip().rstrip(b",")
+        if not line.startswith(b"{"):
+            continue
+        try:
+            name = json.loads(line).get("name")
+        except ValueError:
+            continue
+        if name:
+            hashes.append(name_hash(name))
+    return hashes
+
+def build_from_dump(source, path=BLOOM_FILE, capacity=DEFAULT_CAPACITY, fp_rate=BLOOM_FALSE_POSITIVE_RATE, workers=None):
+    from multiprocessing import Pool
+    builder = BloomBuilder(capacity, fp_rate)
+    workers = workers or max(1, (os.cpu_count() or 2) - 1)
+    start = last_report = time.perf_counter()
+    with open_dump(source) as stream, Pool(workers) as pool:
+        for _, hashes in bounded_map(pool, hash_chunk, read_chunks(stream, 0), 2 * workers):
+            builder.add_hashes(hashes)
+            now = time.perf_counter()
+            if now - last_report >= 5:
+                print(f"[Bloom] {builder.added:,} systems ({builder.added / (now - start):,.0f}/s)")
+                last_report = now
+    return finish(builder, path, start)
+
+def build_from_db(db_path=GALAXY_DB_FILE, path=BLOOM_FILE, fp_rate=BLOOM_FALSE_POSITIVE_RATE, batch_size=1_000_000):
+    # The galaxy database already stores every name's hash, so nothing is re-parsed or re-hashed
+    import sqlite3
+    db = sqlite3.connect(db_path)
+    total = db.execute("SELECT COUNT(*) FROM systems").fetchone()[0]
+    builder = BloomBuilder(max(1000, int(total * 1.1)), fp_rate)  # headroom for delta updates
+    start = time.perf_counter()
+    cursor = db.execute("SELECT name_hash FROM systems")
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        builder.add_hashes([row[0] for row in rows])
+    db.close()
+    return finish(builder, path, start)
+
+def finish(builder, path, start):
+    builder.save(path)
+    elapsed = time.perf_counter() - start
+    size = os.path.getsize(path)
+    print(f"[Bloom] {builder.added:,} systems in {elapsed:.1f}s -> {path} "
+          f"({size / 2**20:,.1f} MB, {builder.hashes} hashes)")
+    return builder.added
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build CETI's known-systems filter")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_parser = sub.add_parser("build", help="build the filter from an EDSM dump or the galaxy database")
+    build_parser.add_argument("source", nargs="?", default=EDSM_DUMP_URL, help="dump file or URL")
+    build_parser.add_argument("--from-db", action="store_true", help=f"build from {GALAXY_DB_FILE} instead of a dump")
+    build_parser.add_argument("--db", default=GALAXY_DB_FILE)
+    build_parser.add_argument("--out", default=BLOOM_FILE)
+    build_parser.add_argument("--capacity", type=int, default=DEFAULT_CAPACITY, help="expected systems (dump builds)")
+    build_parser.add_argument("--fp-rate", type=float, default=BLOOM_FALSE_POSITIVE_RATE)
+    build_parser.add_argument("--workers", type=int, default=None)
+    check_parser = sub.add_parser("check", help="ask the filter about system names")
+    check_parser.add_argument("names", nargs="+")
+    args = parser.parse_args()
+
+    if args.command == "build" and args.from_db:
+        build_from_db(args.db, args.out, args.fp_rate)
+    elif args.command == "build":
+        build_from_dump(args.source, args.out, args.capacity, args.fp_rate, args.workers)
+    else:
+        known = KnownSystemsFilter(BLOOM_FILE)
+        for name in args.names:
+            print(f"{name}: {'possibly known' if known.might_contain(name) else 'definitely unknown'}")
@@ -0,0 +1,56 @@
+import threading, time
+from core.metrics import METRICS
+from core.constants import BREAKER_FAILURES, BREAKER_COOLDOWN
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+_breakers = {}
+_lock = threading.Lock()
+
+class CircuitBreaker:
+    # Trips after `failures` consecutive failed lookups and skips the provider for
+    # `cooldown` seconds; then a single trial lookup decides whether it closes again
+    def __init__(self, provider, failures=BREAKER_FAILURES, cooldown=BREAKER_COOLDOWN):
+        self.provider = provider
+        self.threshold = failures
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+                return True
+            return False  # open, or half-open with the trial still running
+
+    def record(self, ok):
+        with self.lock:
+            if ok:
+                if self.state != CLOSED:
+                    print(f"[Breaker] {self.provider} recovered")
+                self.state = CLOSED
+                self.failures = 0
+                return
+
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.threshold:
+                if self.state != OPEN:
+                    print(f"[Breaker] {self.provider} failing, skipped for {self.cooldown}s")
+                    METRICS.count("ceti_breaker_trips_total", provider=self.provider)
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+def get_breaker(provider):
+    breaker = _breakers.get(provider)
+    if breaker is None:
+        with _lock:
+            breaker = _breakers.setdefault(provider, CircuitBreaker(provider))
+    return breaker
+
+def breaker_states():
+    return {provider: breaker.state for provider, breaker in _breakers.items()}
@@ -0,0 +1,129 @@
+from collections import OrderedDict
+import json, sqlite3, threading, time
+from core.metrics import METRICS
+from core.constants import CACHE_DB_FILE, CACHE_MEMORY_SIZE, CACHE_TTL_VISITED, CACHE_TTL_NOT_VISITED
+
+def normalize_name(system_name):
+    return " ".join(system_name.split()).lower()
+
+def cache_keys(system_name, system_address):
+    keys = []
+    if system_address and str(system_address) != "0":
+        keys.append(f"a:{system_address}")
+    if system_name:
+        keys.append(f"n:{normalize_name(system_name)}")
+    return keys
+
+class StatusCache:
+    # Two tiers: a bounded OrderedDict LRU for instant hits and a SQLite table
+    # so results survive restarts. Entries are stored under both the
+    # SystemAddress and the normalized name.
+    def __init__(self, path=CACHE_DB_FILE, memory_size=CACHE_MEMORY_SIZE,
+                 ttl_visited=CACHE_TTL_VISITED, ttl_not_visited=CACHE_TTL_NOT_VISITED):
+        self.memory = OrderedDict()
+        self.memory_size = memory_size
+        self.ttl_visited = ttl_visited
+        self.ttl_not_visited = ttl_not_visited
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS status (
+                key TEXT PRIMARY KEY,
+                name TEXT,
+                address TEXT,
+                visited INTEGER,
+                results TEXT,
+                stored_at REAL
+            )
+        """)
+        self.db.execute("DELETE FROM status WHERE stored_at < ?", (time.time() - max(ttl_visited, ttl_not_visited),))
+        self.db.commit()
+
+    def _expired(self, entry, now):
+        ttl = self.ttl_visited if entry["visited"] else self.ttl_not_visited
+        return now - entry["stored_at"] > ttl
+
+    def _remember(self, key, entry):
+        self.memory[key] = entry
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+
+    def get(self, system_name, system_address=None, record_stats=True):
+        now = time.time()
+        keys = cache_keys(system_name, system_address)
+        with self.lock:
+            for key in keys:
+                entry = self.memory.get(key)
+                if entry is not None and not self._expired(entry, now):
+                    self.memory.move_to_end(key)
+                    self.hits += record_stats
+                    if record_stats:
+                        METRICS.count("ceti_cache_total", result="memory_hit")
+                    return entry
+
+            for key in keys:
+                row = self.db.execute(
+                    "SELECT name, address, visited, results, stored_at FROM status WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    continue
+                entry = {
+                    "name": row[0],
+                    "address": row[1],
+                    "visited": bool(row[2]),
+                    "results": json.loads(row[3]),
+                    "stored_at": row[4],
+                }
+                if self._expired(entry, now):
+                    continue
+                for k in keys:
+                    self._remember(k, entry)
+                self.hits += record_stats
+                self.disk_hits += record_stats
+                if record_stats:
+                    METRICS.count("ceti_cache_total", result="disk_hit")
+                return entry
+
+            self.misses += record_stats
+            if record_stats:
+                METRICS.count("ceti_cache_total", result="miss")
+            return None
+
+    def put(self, system_name, system_address, visited, results):
+        entry = {
+            "name": system_name,
+            "address": system_address,
+            "visited": bool(visited),
+            "results": results,
+            "stored_at": time.time(),
+        }
+        keys = cache_keys(system_name, system_address)
+        payload = json.dumps(results)
+        with self.lock:
+            for key in keys:
+                self._remember(key, entry)
+            self.db.executemany(
+                "INSERT OR REPLACE INTO status (key, name, address, visited, results, stored_at) VALUES (?, ?, ?, ?, ?, ?)",
+                [(key, system_name, system_address, int(entry["visited"]), payload, entry["stored_at"]) for key in keys]
+            )
+            self.db.commit()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def close(self):
+        with self.lock:
+            self.db.close()
@@ -0,0 +1,118 @@
+# requests/httpx are imported on first use; they cost ~100 ms of startup otherwise
+import threading, time
+from core.metrics import METRICS
+from core.scheduler import get_scheduler, current_priority, max_wait, RETRY_STATUSES
+from core.constants import VERSION, PROVIDER_TIMEOUTS, PROVIDER_RETRIES, USE_HTTP2
+
+DEFAULT_TIMEOUT = (3.05, 10)
+USER_AGENT = f"CETI/{VERSION}"
+
+_clients = {}
+_lock = threading.Lock()
+
+def _build_requests_session(retries):
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    session = requests.Session()
+    session.headers["User-Agent"] = USER_AGENT
+    # Connection failures only; status retries (429/5xx) go through the scheduler's backoff
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=0,
+        status=0,
+        backoff_factor=0.3,
+        allowed_methods=frozenset(["GET"]),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def _build_http2_client(retries, timeout):
+    import httpx
+    connect, read = timeout
+    client = httpx.Client(
+        http2=True,
+        headers={"User-Agent": USER_AGENT},
+        timeout=httpx.Timeout(read, connect=connect),
+        limits=httpx.Limits(max_connections=8, max_keepalive_connections=8),
+        transport=httpx.HTTPTransport(http2=True, retries=retries),
+    )
+    client.is_http2 = True
+    return client
+
+def _get_client(provider):
+    client = _clients.get(provider)
+    if client is not None:
+        return client
+
+    with _lock:
+        if provider not in _clients:
+            retries = PROVIDER_RETRIES.get(provider, 1)
+            timeout = PROVIDER_TIMEOUTS.get(provider, DEFAULT_TIMEOUT)
+            if USE_HTTP2:
+                try:
+                    _clients[provider] = _build_http2_client(retries, timeout)
+                except ImportError:  # httpx missing, or installed without the h2 extra
+                    _clients[provider] = _build_requests_session(retries)
+            else:
+                _clients[provider] = _build_requests_session(retries)
+        return _clients[provider]
+
+def _send(client, url, params, timeout):
+    if not getattr(client, "is_http2", False):
+        return client.get(url, params=params, timeout=timeout)
+    import httpx
+    connect, read = timeout
+    return client.get(url, params=params, timeout=httpx.Timeout(read, connect=connect))
+
+def get(provider, url, params=None, timeout=None):
+    # One keep-alive pool per provider so repeat lookups skip the TCP/TLS handshake.
+    # Every attempt is admitted by the provider's scheduler at the calling thread's priority.
+    timeout = timeout or PROVIDER_TIMEOUTS.get(provider, DEFAULT_TIMEOUT)
+    client = _get_client(provider)
+    scheduler = get_scheduler(provider)
+    level = current_priority()
+    retries = PROVIDER_RETRIES.get(provider, 1)
+    for attempt in range(retries + 1):
+        scheduler.acquire(level, max_wait(level))
+        start = time.perf_counter()
+        try:
+            response = _send(client, url, params, timeout)
+        except Exception as e:
+            scheduler.release()
+            kind = "timeout" if "Timeout" in type(e).__name__ else "error"
+            METRICS.count("ceti_http_failures_total", provider=provider, kind=kind)
+            raise
+        scheduler.release(response.status_code, response.headers)
+        METRICS.observe("ceti_http_request_ms", (time.perf_counter() - start) * 1000, provider=provider)
+        METRICS.count("ceti_http_responses_total", provider=provider, status=response.status_code)
+        if response.status_code not in RETRY_STATUSES or attempt == retries:
+            return response
+        response.close()
+
+def open_stream(provider, url, timeout=(5, 60)):
+    # Raw byte stream for large downloads (dumps); always plain requests so it can be read incrementally
+    key = f"{provider}:stream"
+    with _lock:
+        if key not in _clients:
+            _clients[key] = _build_requests_session(PROVIDER_RETRIES.get(provider, 1))
+        session = _clients[key]
+    response = session.get(url, stream=True, timeout=timeout)
+    response.raise_for_status()
+    return response.raw
+
+def preload():
+    # Import the HTTP stack and open the provider pools off the startup path
+    for provider in PROVIDER_TIMEOUTS:
+        _get_client(provider)
+
+def close_all():
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
@@ -1,12 +1,84 @@
-import re
+import os, re
 
 VERSION = "1.5"
 
-EDASTRO_API_URL = "https://edastro.com/api/starsystem?q={}"
-EDSM_API_URL = "https://www.edsm.net/api-v1/systems?systemName={}&showId=1"
-EDSM_SYSTEM_URL = "https://www.edsm.net/en/system?systemName={}"
-SPHERE_SYSTEMS_API_URL = "https://www.edsm.net/api-v1/sphere-systems?x={}&y={}&z={}&radius={}&showId=1&showCoordinates=1"
+# Hosts can be pointed elsewhere (e.g. bench/stub_server.py) through the environment
+EDSM_HOST = os.environ.get("CETI_EDSM_HOST", "https://www.edsm.net")
+EDASTRO_HOST = os.environ.get("CETI_EDASTRO_HOST", "https://edastro.com")
+
+EDASTRO_API_URL = EDASTRO_HOST + "/api/starsystem?q={}"
+EDSM_API_URL = EDSM_HOST + "/api-v1/systems?systemName={}&showId=1&showCoordinates=1"
+EDSM_BULK_API_URL = EDSM_HOST + "/api-v1/systems?showId=1&showCoordinates=1"
+EDSM_BULK_URL_LIMIT = 2000  # characters; keeps bulk requests under common proxy/server URL limits
+EDSM_SYSTEM_URL = EDSM_HOST + "/en/system?systemName={}"
+SPHERE_SYSTEMS_API_URL = EDSM_HOST + "/api-v1/sphere-systems?x={}&y={}&z={}&radius={}&showId=1&showCoordinates=1"
 SPANSH_SYSTEM_URL = "https://spansh.co.uk/system/{}"
 GITHUB_LINK = "https://github.com/carsonbfl/CETI"
 
+JOURNAL_DIR = os.environ.get("CETI_JOURNAL_DIR") or os.path.expanduser("~/Saved Games/Frontier Developments/Elite Dangerous/")
+
 last_queried_system = None
+
+TARGET_DEBOUNCE_MS = 150  # FSDTarget events closer together than this only look up the last one
+
+# HTTP client settings per provider: (connect, read) timeouts in seconds and retry count
+PROVIDER_TIMEOUTS = {
+    "edsm": (3.05, 8),
+    "edastro": (3.05, 8),
+}
+PROVIDER_RETRIES = {
+    "edsm": 2,
+    "edastro": 1,
+}
+SPHERE_SYSTEMS_TIMEOUT = (3.05, 20)
+USE_HTTP2 = False  # needs httpx[http2]; falls back to requests when unavailable
+
+# Request scheduler (core/scheduler.py): per-provider concurrency, the share of the
+# x-rate-limit budget kept back for interactive lookups, and 429/5xx backoff in seconds
+PROVIDER_CONCURRENCY = {
+    "edsm": 4,
+    "edastro": 4,
+}
+RATE_LIMIT_RESERVE = 0.1
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30
+INTERACTIVE_MAX_WAIT = 3
+
+# A provider that fails BREAKER_FAILURES lookups in a row is skipped for BREAKER_COOLDOWN seconds.
+# A target lookup stops waiting after LOOKUP_DEADLINE_MS and shows what has arrived.
+BREAKER_FAILURES = 3
+BREAKER_COOLDOWN = 30
+LOOKUP_DEADLINE_MS = 2500
+
+# Status cache: in-memory LRU in front of SQLite. TTLs are in seconds.
+CACHE_DB_FILE = "CETI_cache.db"
+CACHE_MEMORY_SIZE = 2048
+CACHE_TTL_VISITED = 30 * 24 * 3600
+CACHE_TTL_NOT_VISITED = 6 * 3600
+
+# Offline galaxy database built from the EDSM nightly dumps
+GALAXY_DB_FILE = "CETI_galaxy.db"
+EDSM_DUMP_URL = EDSM_HOST + "/dump/systemsWithCoordinates.json.gz"
+EDSM_DELTA_URL = EDSM_HOST + "/dump/systemsWithCoordinates7days.json.gz"
+NEARBY_RESULTS = 10
+NEARBY_RADIUS = 50  # Find Nearby's starting radius when it is prefilled from the target
+
+# Bloom filter of every system in the EDSM dump (core/bloom.py). A miss means "not known to
+# EDSM as of the build", and is shown as "not visited" without asking the providers, so it is
+# only trusted for about the dump cadence; `python -m core.galaxy sync` keeps it that fresh.
+BLOOM_FILE = "CETI_known.bloom"
+BLOOM_FALSE_POSITIVE_RATE = 0.01
+BLOOM_MAX_AGE = 2 * 24 * 3600
+
+# Personal visit history built from the player's own journals
+HISTORY_DB_FILE = "CETI_history.db"
+
+# Settings and saved systems (the CSV is only read once, to migrate it)
+CONFIG_FILE = "CETI_config.json"
+SAVED_SYSTEMS_DB_FILE = "CETI_saved_systems.db"
+LEGACY_CSV_FILE = "CETI1.5_saved_systems.csv"  # written by 1.5, the last release that saved to CSV
+SAVE_FLUSH_INTERVAL = 2.0  # seconds between batched writes of saved systems
+
+# Metrics export: text file written from the tray menu, optional Prometheus-style endpoint on localhost
+METRICS_FILE = "CETI_metrics.prom"
+METRICS_PORT = int(os.environ.get("CETI_METRICS_PORT", "0")) or None
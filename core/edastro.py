@@ -1,10 +1,11 @@
-import requests
+from core import client
+from core.scheduler import RateLimited
 from core.constants import EDASTRO_API_URL
 
 def check_system_on_edastro(system_name):
     try:
         url = EDASTRO_API_URL.format(system_name)
-        response = requests.get(url)
+        response = client.get("edastro", url)
         status = response.status_code
 
         if status == 200:
@@ -14,9 +15,11 @@ def check_system_on_edastro(system_name):
             else:
                 return False, url, status
         else:
-            return False, url, status
+            return None, url, status
 
+    except RateLimited:
+        return None, None, "throttled"  # our own scheduler gave up waiting; EDASTRO itself is fine
     except Exception as e:
         print(f"[EDASTRO] Error: {e}")
-        return False, None, 0
+        return None, None, None
 
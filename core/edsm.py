@@ -1,14 +1,103 @@
-import requests
-from core.constants import EDSM_API_URL
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+from core import client
+from core.cache import normalize_name
+from core.constants import EDSM_API_URL, EDSM_BULK_API_URL, EDSM_BULK_URL_LIMIT
+from core.galaxy import get_galaxy
+from core.scheduler import priority, current_priority, RateLimited
+
+def system_details(system):
+    # What the rest of CETI keeps from an EDSM system: its id and coordinates
+    coords = system.get("coords")
+    return {
+        "id": system.get("id"),
+        "coords": (coords["x"], coords["y"], coords["z"]) if coords else None,
+    }
 
 def check_system_on_edsm(system_name):
+    # Returns (visited, details, status); details holds the EDSM id and coordinates
+    # Systems in the offline dump are known to EDSM, so answer those without a request
+    galaxy = get_galaxy()
+    if galaxy is not None:
+        known = galaxy.lookup(system_name)
+        if known is not None:
+            return True, {"id": known["edsm_id"], "coords": known["coords"]}, "local"
+
     try:
-        response = requests.get(EDSM_API_URL.format(system_name))
-        if response.status_code == 200 and response.json():
-            data = response.json()[0]
-            return True, data.get("id", None), response.status_code
+        response = client.get("edsm", EDSM_API_URL.format(system_name))
+        if response.status_code != 200:
+            # Rate limits and outages say nothing about the system; never report them as "not visited"
+            return None, None, response.status_code
+        data = response.json()
+        if data:
+            return True, system_details(data[0]), response.status_code
         else:
             return False, None, response.status_code
+    except RateLimited:
+        return None, None, "throttled"  # our own scheduler gave up waiting; EDSM itself is fine
     except Exception as e:
         print(f"[EDSM] Error: {e}")
-        return None, None, None
\ No newline at end of file
+        return None, None, None
+
+def get_system_coords(system_name):
+    _, details, _ = check_system_on_edsm(system_name)
+    return details["coords"] if details else None
+
+def chunk_names(names, url_limit=EDSM_BULK_URL_LIMIT):
+    # Pack as many systemName[] parameters into each request as the URL limit allows
+    chunk, length = [], len(EDSM_BULK_API_URL)
+    for name in names:
+        param = len("&systemName%5B%5D=") + len(quote(name))
+        if chunk and length + param > url_limit:
+            yield chunk
+            chunk, length = [], len(EDSM_BULK_API_URL)
+        chunk.append(name)
+        length += param
+    if chunk:
+        yield chunk
+
+def _check_chunk(names):
+    try:
+        response = client.get("edsm", EDSM_BULK_API_URL, params={"systemName[]": names})
+        status = response.status_code
+        data = response.json() if status == 200 else None
+    except Exception as e:
+        print(f"[EDSM] Bulk error: {e}")
+        return {name: (None, None, None) for name in names}
+
+    if data is None:
+        return {name: (None, None, status) for name in names}
+    found = {normalize_name(system["name"]): system_details(system) for system in data if system.get("name")}
+    results = {}
+    for name in names:
+        key = normalize_name(name)
+        results[name] = (True, found[key], status) if key in found else (False, None, status)
+    return results
+
+def check_systems_on_edsm(system_names, max_workers=4):
+    # Batch version of check_system_on_edsm: returns {name: (visited, details, status)}
+    results = {}
+    remaining = []
+    galaxy = get_galaxy()
+    for name in dict.fromkeys(system_names):
+        known = galaxy.lookup(name) if galaxy is not None else None
+        if known is not None:
+            results[name] = (True, {"id": known["edsm_id"], "coords": known["coords"]}, "local")
+        else:
+            remaining.append(name)
+
+    chunks = list(chunk_names(remaining))
+    if len(chunks) == 1:
+        results.update(_check_chunk(chunks[0]))
+    elif chunks:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks)), thread_name_prefix="CETI-edsm-bulk") as pool:
+            # Chunk threads inherit the caller's scheduling priority
+            level = current_priority()
+
+            def check_chunk(names):
+                with priority(level):
+                    return _check_chunk(names)
+
+            for chunk_results in pool.map(check_chunk, chunks):
+                results.update(chunk_results)
+    return results
@@ -0,0 +1,41 @@
+import json
+
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:
+    loads = json.loads
+
+EVENT_KEY = b'"event":'
+
+def event_name(line):
+    # Journal lines put "event" right after "timestamp", so the first match is the top-level key
+    key = line.find(EVENT_KEY)
+    if key == -1:
+        return None
+    start = line.find(b'"', key + len(EVENT_KEY))
+    end = line.find(b'"', start + 1)
+    if start == -1 or end == -1:
+        return None
+    return line[start + 1:end]
+
+class EventDispatcher:
+    # Routes raw journal lines to handlers by event type. Lines nobody
+    # subscribed to are dropped before they are ever JSON-decoded.
+    def __init__(self):
+        self.handlers = {}
+
+    def subscribe(self, event, handler):
+        self.handlers.setdefault(event.encode("ascii"), []).append(handler)
+
+    def dispatch(self, line):
+        handlers = self.handlers.get(event_name(line))
+        if not handlers:
+            return False
+        try:
+            entry = loads(line)
+        except ValueError:
+            return False
+        for handler in handlers:
+            handler(entry)
+        return True
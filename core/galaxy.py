@@ -0,0 +1,327 @@
+# Offline copy of the EDSM systems dump ~ python -m core.galaxy import [dump]
+# Kept fresh from EDSM's delta dumps ~ python -m core.galaxy sync [delta dump]
+from collections import deque
+import argparse, calendar, gzip, hashlib, json, os, sqlite3, threading, time
+from core.cache import normalize_name
+from core.constants import GALAXY_DB_FILE, EDSM_DUMP_URL, EDSM_DELTA_URL, BLOOM_FILE
+
+COORD_SCALE = 32  # EDSM coordinates are multiples of 1/32 ly, so they fit exactly in integers
+CHUNK_LINES = 20000
+
+def name_hash(system_name):
+    digest = hashlib.blake2b(normalize_name(system_name).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+def parse_entries(lines):
+    for line in lines:
+        line = line.strip().rstrip(b",")
+        if not line.startswith(b"{"):
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            continue
+
+def entry_row(entry):
+    id64, name, coords = entry.get("id64"), entry.get("name"), entry.get("coords")
+    if id64 is None or not name or not coords:
+        return None
+    return (
+        id64, name_hash(name), name, entry.get("id"),
+        round(coords["x"] * COORD_SCALE), round(coords["y"] * COORD_SCALE), round(coords["z"] * COORD_SCALE),
+    )
+
+def parse_chunk(lines):
+    return [row for row in map(entry_row, parse_entries(lines)) if row is not None]
+
+def parse_delta_chunk(task):
+    # Rows newer than the watermark, plus the newest and oldest "date" seen in the chunk.
+    # EDSM dates are "YYYY-MM-DD HH:MM:SS" (UTC), so plain string comparison orders them.
+    lines, watermark = task
+    rows, newest, oldest = [], "", None
+    for entry in parse_entries(lines):
+        date = entry.get("date") or ""
+        if date:
+            newest = max(newest, date)
+            oldest = date if oldest is None else min(oldest, date)
+        if watermark and date and date <= watermark:
+            continue
+        row = entry_row(entry)
+        if row is not None:
+            rows.append(row)
+    return rows, newest, oldest
+
+class GalaxyDB:
+    def __init__(self, path=GALAXY_DB_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS systems (
+                id64 INTEGER PRIMARY KEY,
+                name_hash INTEGER NOT NULL,
+                name TEXT,
+                edsm_id INTEGER,
+                x INTEGER, y INTEGER, z INTEGER
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS systems_name_hash ON systems (name_hash)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        # Integer R*Tree over the fixed-point coordinates, used by core.spatial
+        has_rtree = self.db.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'systems_rtree'"
+        ).fetchone()
+        if not has_rtree:
+            self.db.execute("CREATE VIRTUAL TABLE systems_rtree USING rtree_i32 (id64, x0, x1, y0, y1, z0, z1)")
+            self.db.execute("INSERT INTO systems_rtree SELECT id64, x, x, y, y, z, z FROM systems")
+        self.db.commit()
+
+    def lookup(self, system_name):
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT id64, name, edsm_id, x, y, z FROM systems WHERE name_hash = ?",
+                (name_hash(system_name),)
+            ).fetchall()
+        wanted = normalize_name(system_name)
+        for id64, name, edsm_id, x, y, z in rows:
+            if normalize_name(name) == wanted:
+                return {
+                    "id64": id64,
+                    "name": name,
+                    "edsm_id": edsm_id,
+                    "coords": (x / COORD_SCALE, y / COORD_SCALE, z / COORD_SCALE),
+                }
+        return None
+
+    def query_box(self, x0, x1, y0, y1, z0, z1):
+        # Bounds are in light years; returns raw (id64, name, edsm_id, x, y, z) rows.
+        # Every system in the dump is known to EDSM, i.e. visited, so there is nothing to filter on.
+        sql = (
+            "SELECT s.id64, s.name, s.edsm_id, s.x, s.y, s.z FROM systems_rtree r "
+            "JOIN systems s ON s.id64 = r.id64 "
+            "WHERE r.x0 >= ? AND r.x1 <= ? AND r.y0 >= ? AND r.y1 <= ? AND r.z0 >= ? AND r.z1 <= ?"
+        )
+        params = [
+            int(x0 * COORD_SCALE) - 1, int(x1 * COORD_SCALE) + 1,
+            int(y0 * COORD_SCALE) - 1, int(y1 * COORD_SCALE) + 1,
+            int(z0 * COORD_SCALE) - 1, int(z1 * COORD_SCALE) + 1,
+        ]
+        with self.lock:
+            return self.db.execute(sql, params).fetchall()
+
+    def get_meta(self, key, default=None):
+        with self.lock:
+            row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def write_rows(self, rows, meta=None):
+        # Rows and the resume marker commit together, so an interrupted import picks up exactly here
+        with self.lock:
+            with self.db:
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO systems (id64, name_hash, name, edsm_id, x, y, z) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO systems_rtree (id64, x0, x1, y0, y1, z0, z1) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(r[0], r[4], r[4], r[5], r[5], r[6], r[6]) for r in rows]
+                )
+                for key, value in (meta or {}).items():
+                    self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def count(self):
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM systems").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+_galaxy = None
+_galaxy_lock = threading.Lock()
+
+def get_galaxy():
+    # Shared read handle for providers; None until a dump has been imported
+    global _galaxy
+    if _galaxy is None and os.path.isfile(GALAXY_DB_FILE):
+        with _galaxy_lock:
+            if _galaxy is None:
+                _galaxy = GalaxyDB(GALAXY_DB_FILE)
+    return _galaxy
+
+def open_dump(source, headers=None):
+    # `headers`, if given, is filled with the HTTP response headers of a remote dump
+    if source.startswith(("http://", "https://")):
+        from core import client
+        raw = client.open_stream("edsm", source)
+        if headers is not None:
+            headers.update(raw.headers)
+        return gzip.GzipFile(fileobj=raw)
+    if source.endswith(".gz"):
+        return gzip.open(source, "rb")
+    return open(source, "rb")
+
+def read_chunks(stream, skip_lines):
+    chunk = []
+    for line_no, line in enumerate(stream, 1):
+        if line_no <= skip_lines:
+            continue
+        chunk.append(line)
+        if len(chunk) >= CHUNK_LINES:
+            yield line_no, chunk
+            chunk = []
+    if chunk:
+        yield line_no, chunk
+
+def bounded_map(pool, func, tasks, in_flight):
+    # Ordered pool map over (key, arg) pairs, yielding (key, result). Unlike Pool.imap it
+    # stops reading tasks while `in_flight` are queued or done but not yet consumed, so
+    # workers that parse faster than SQLite writes can't pile a whole dump up in memory.
+    pending = deque()
+    for key, arg in tasks:
+        pending.append((key, pool.apply_async(func, (arg,))))
+        if len(pending) >= in_flight:
+            key, result = pending.popleft()
+            yield key, result.get()
+    while pending:
+        key, result = pending.popleft()
+        yield key, result.get()
+
+def dump_version(source, headers):
+    # Identifies one generation of a dump, so a resume marker is never applied to the next day's file
+    if headers:
+        # Header names are case-insensitive, and the copy open_dump() makes is a plain dict
+        headers = {name.lower(): value for name, value in headers.items()}
+        return headers.get("etag") or headers.get("last-modified") or ""
+    stat = os.stat(source)
+    return f"{stat.st_size}:{int(stat.st_mtime)}"
+
+def resume_line(progress, version):
+    # Line to resume after from a "<version>|<line>" marker; 0 for another or unknown generation
+    marker_version, _, line = progress.rpartition("|")
+    return int(line) if version and marker_version == version else 0
+
+def dump_time(date):
+    return calendar.timegm(time.strptime(date, "%Y-%m-%d %H:%M:%S"))
+
+def import_dump(source, db_path=GALAXY_DB_FILE, workers=None):
+    from multiprocessing import Pool
+    galaxy = GalaxyDB(db_path)
+    progress_key = f"import:{os.path.basename(source)}"
+    workers = workers or max(1, (os.cpu_count() or 2) - 1)
+    imported = 0
+    start = last_report = time.perf_counter()
+    headers = {}
+
+    with open_dump(source, headers) as stream, Pool(workers) as pool:
+        # The marker is only honoured for the same generation of the dump; tomorrow's nightly
+        # file has different lines, so resuming it by line number would drop systems
+        version = dump_version(source, headers)
+        progress = galaxy.get_meta(progress_key, "")
+        skip_lines = resume_line(progress, version)
+        if skip_lines:
+            print(f"[Galaxy] Resuming {source} after line {skip_lines}")
+
+        for line_no, rows in bounded_map(pool, parse_chunk, read_chunks(stream, skip_lines), 2 * workers):
+            galaxy.write_rows(rows, {progress_key: f"{version}|{line_no}"})
+            imported += len(rows)
+            now = time.perf_counter()
+            if now - last_report >= 5:
+                print(f"[Galaxy] {imported:,} rows ({imported / (now - start):,.0f} rows/s)")
+                last_report = now
+
+    galaxy.write_rows([], {progress_key: "", "last_import": source})
+    elapsed = time.perf_counter() - start
+    print(f"[Galaxy] Imported {imported:,} rows in {elapsed:.1f}s ({imported / max(elapsed, 1e-9):,.0f} rows/s), "
+          f"{galaxy.count():,} systems total")
+    galaxy.close()
+    return imported
+
+def sync_delta(source=EDSM_DELTA_URL, db_path=GALAXY_DB_FILE, bloom_path=BLOOM_FILE, workers=None):
+    # Applies a systemsWithCoordinates delta dump on top of an imported database:
+    #  - entries dated at or before the watermark (the newest date of the last completed sync)
+    #    are skipped, so the overlap between consecutive 7-day dumps costs only parsing;
+    #  - the resume marker is tied to the dump's version, so an interrupted sync picks up
+    #    where it stopped, but never skips lines of a newer file;
+    #  - new systems are also set in the known-systems filter, which is marked fresh again
+    #    when the dump reaches back to the filter's build time.
+    from multiprocessing import Pool
+    if not os.path.isfile(db_path):
+        print(f"[Galaxy] {db_path} not found; run `python -m core.galaxy import` first")
+        return 0
+    galaxy = GalaxyDB(db_path)
+    known = None
+    if os.path.isfile(bloom_path):
+        from core.bloom import FilterUpdater
+        try:
+            known = FilterUpdater(bloom_path)
+        except (OSError, ValueError) as e:
+            print(f"[Galaxy] Not updating {bloom_path}: {e}")
+
+    watermark = galaxy.get_meta("sync:watermark", "")
+    workers = workers or max(1, min(4, (os.cpu_count() or 2) - 1))
+    applied = 0
+    start = last_report = time.perf_counter()
+    headers = {}
+
+    with open_dump(source, headers) as stream, Pool(workers) as pool:
+        version = dump_version(source, headers)
+        progress = galaxy.get_meta("sync:progress", "")
+        skip_lines, newest, oldest = resume_line(progress, version), watermark, None
+        if skip_lines:
+            newest = galaxy.get_meta("sync:newest", watermark)
+            oldest = galaxy.get_meta("sync:oldest") or None
+            print(f"[Galaxy] Resuming {source} after line {skip_lines}")
+
+        tasks = ((line_no, (chunk, watermark)) for line_no, chunk in read_chunks(stream, skip_lines))
+        for line_no, (rows, chunk_newest, chunk_oldest) in bounded_map(pool, parse_delta_chunk, tasks, 2 * workers):
+            newest = max(newest, chunk_newest)
+            if chunk_oldest:
+                oldest = chunk_oldest if oldest is None else min(oldest, chunk_oldest)
+            if known is not None:
+                known.add_hashes([row[1] for row in rows])
+            galaxy.write_rows(rows, {"sync:progress": f"{version}|{line_no}",
+                                     "sync:newest": newest, "sync:oldest": oldest or ""})
+            applied += len(rows)
+            now = time.perf_counter()
+            if now - last_report >= 5:
+                print(f"[Galaxy] {applied:,} rows ({applied / (now - start):,.0f} rows/s)")
+                last_report = now
+
+    if watermark and oldest and oldest > watermark:
+        print(f"[Galaxy] The delta starts at {oldest}, after the last sync ({watermark}); "
+              f"systems added in between are missing until the next full import")
+    galaxy.write_rows([], {"sync:watermark": newest, "sync:progress": "", "last_sync": int(time.time())})
+    if known is not None:
+        # A miss is trustworthy again only if this delta covers everything since the build
+        fresh = bool(oldest) and known.built_at >= dump_time(oldest)
+        known.close(built_at=time.time() if fresh else None)
+        print(f"[Galaxy] Added {known.added:,} new systems to {bloom_path}"
+              f"{'' if fresh else ' (older than the delta, so its age is unchanged)'}")
+
+    elapsed = time.perf_counter() - start
+    print(f"[Galaxy] Synced {applied:,} rows in {elapsed:.1f}s ({applied / max(elapsed, 1e-9):,.0f} rows/s), "
+          f"up to {newest or 'nothing new'}, {galaxy.count():,} systems total")
+    galaxy.close()
+    return applied
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build CETI's offline galaxy database from an EDSM dump")
+    sub = parser.add_subparsers(dest="command", required=True)
+    import_parser = sub.add_parser("import", help="stream a systemsWithCoordinates dump into the database")
+    import_parser.add_argument("source", nargs="?", default=EDSM_DUMP_URL, help="dump file or URL")
+    import_parser.add_argument("--db", default=GALAXY_DB_FILE)
+    import_parser.add_argument("--workers", type=int, default=None)
+    sync_parser = sub.add_parser("sync", help="apply an EDSM delta dump (systems added or updated recently)")
+    sync_parser.add_argument("source", nargs="?", default=EDSM_DELTA_URL, help="delta dump file or URL")
+    sync_parser.add_argument("--db", default=GALAXY_DB_FILE)
+    sync_parser.add_argument("--bloom", default=BLOOM_FILE, help="known-systems filter to update, if present")
+    sync_parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.command == "import":
+        import_dump(args.source, args.db, args.workers)
+    elif args.command == "sync":
+        sync_delta(args.source, args.db, args.bloom, args.workers)
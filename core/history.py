@@ -0,0 +1,152 @@
+# Personal visited-systems index ~ python -m core.history backfill
+import argparse, os, sqlite3, threading, time
+from core.cache import normalize_name
+from core.constants import HISTORY_DB_FILE, JOURNAL_DIR
+from core.events import event_name, loads
+
+VISIT_EVENTS = {b"FSDJump", b"Location", b"CarrierJump", b"Scan"}
+
+def parse_visit(entry):
+    address, name = entry.get("SystemAddress"), entry.get("StarSystem")
+    if not address or not name:
+        return None
+    return address, name, entry.get("StarPos"), entry.get("timestamp", "")
+
+def parse_journal_file(path):
+    # Runs in a worker process; returns one entry per system with its earliest timestamp
+    size = os.path.getsize(path)
+    visits = {}
+    with open(path, "rb") as f:
+        for line in f:
+            if event_name(line) not in VISIT_EVENTS:
+                continue
+            try:
+                visit = parse_visit(loads(line))
+            except ValueError:
+                continue
+            if visit is None:
+                continue
+            address, name, pos, timestamp = visit
+            known = visits.get(address)
+            if known is None:
+                visits[address] = [name, pos, timestamp]
+            else:
+                if pos and not known[1]:
+                    known[1] = pos
+                if timestamp < known[2]:
+                    known[2] = timestamp
+    return path, size, visits
+
+class VisitHistory:
+    def __init__(self, path=HISTORY_DB_FILE):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS visits (
+                address INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                name_key TEXT NOT NULL,
+                x REAL, y REAL, z REAL,
+                first_visit TEXT
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS visits_name_key ON visits (name_key)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS journals (path TEXT PRIMARY KEY, size INTEGER)")
+        self.db.commit()
+
+    def _upsert(self, rows):
+        self.db.executemany("""
+            INSERT INTO visits (address, name, name_key, x, y, z, first_visit) VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (address) DO UPDATE SET
+                x = coalesce(x, excluded.x),
+                y = coalesce(y, excluded.y),
+                z = coalesce(z, excluded.z),
+                first_visit = min(first_visit, excluded.first_visit)
+        """, rows)
+
+    def record(self, address, name, pos=None, timestamp=""):
+        x, y, z = pos if pos else (None, None, None)
+        with self.lock:
+            with self.db:
+                self._upsert([(int(address), name, normalize_name(name), x, y, z, timestamp)])
+
+    def lookup(self, system_name, system_address=None):
+        with self.lock:
+            row = None
+            if system_address and str(system_address) != "0":
+                row = self.db.execute(
+                    "SELECT address, name, x, y, z, first_visit FROM visits WHERE address = ?", (int(system_address),)
+                ).fetchone()
+            if row is None and system_name:
+                row = self.db.execute(
+                    "SELECT address, name, x, y, z, first_visit FROM visits WHERE name_key = ?", (normalize_name(system_name),)
+                ).fetchone()
+        if row is None:
+            return None
+        address, name, x, y, z, first_visit = row
+        return {
+            "address": address,
+            "name": name,
+            "coords": (x, y, z) if x is not None else None,
+            "first_visit": first_visit,
+        }
+
+    def count(self):
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM visits").fetchone()[0]
+
+    def backfill(self, journal_dir=JOURNAL_DIR, workers=None):
+        # Journals already indexed at their current size are skipped, so reruns are cheap
+        try:
+            with os.scandir(journal_dir) as entries:
+                journals = {e.path: e.stat().st_size for e in entries
+                            if e.name.startswith("Journal.") and e.name.endswith(".log")}
+        except OSError:
+            return 0
+
+        with self.lock:
+            done = dict(self.db.execute("SELECT path, size FROM journals"))
+        todo = sorted(path for path, size in journals.items() if done.get(path) != size)
+        if not todo:
+            return 0
+
+        from concurrent.futures import ProcessPoolExecutor
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for path, size, visits in pool.map(parse_journal_file, todo, chunksize=8):
+                rows = [
+                    (address, name, normalize_name(name), *(pos or (None, None, None)), timestamp)
+                    for address, (name, pos, timestamp) in visits.items()
+                ]
+                with self.lock:
+                    with self.db:
+                        self._upsert(rows)
+                        self.db.execute("INSERT OR REPLACE INTO journals (path, size) VALUES (?, ?)", (path, size))
+
+        print(f"[History] Indexed {len(todo)} journals in {time.perf_counter() - start:.1f}s, "
+              f"{self.count():,} systems visited")
+        return len(todo)
+
+    def backfill_async(self, journal_dir=JOURNAL_DIR):
+        thread = threading.Thread(target=self.backfill, args=(journal_dir,), name="CETI-backfill", daemon=True)
+        thread.start()
+        return thread
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index every system in your own journals")
+    sub = parser.add_subparsers(dest="command", required=True)
+    backfill_parser = sub.add_parser("backfill", help="parse the journal directory into the visit index")
+    backfill_parser.add_argument("journal_dir", nargs="?", default=JOURNAL_DIR)
+    backfill_parser.add_argument("--db", default=HISTORY_DB_FILE)
+    backfill_parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.command == "backfill":
+        history = VisitHistory(args.db)
+        history.backfill(args.journal_dir, args.workers)
+        history.close()
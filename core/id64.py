@@ -0,0 +1,80 @@
+# Coordinates from a SystemAddress (id64) ~ python -m core.id64 10477373803
+# Every address packs the system's mass code, sector and boxel, which pin it to a cube
+# 10 to 1280 ly across. The cube's centre is a position estimate that needs no lookup.
+import argparse, math
+
+ORIGIN = (-49985, -40985, -24105)  # corner of sector (0, 0, 0)
+SECTOR_SIZE = 1280
+SECTOR_BITS = (7, 6, 7)  # z, y, x, in the order they are packed above the mass code
+NAN = (math.nan,) * 4
+
+def parse_address(address):
+    try:
+        address = int(address)
+    except (TypeError, ValueError):
+        return None
+    return address if 0 < address < 1 << 64 else None
+
+def decode(address):
+    # (x, y, z, error): boxel centre and the largest distance to any point in the boxel.
+    # None for a missing or malformed address.
+    address = parse_address(address)
+    if address is None:
+        return None
+    mass_code = address & 7
+    boxel_bits = 7 - mass_code
+    shift = 3
+    position = []
+    for sector_bits in SECTOR_BITS:
+        boxel = address >> shift & (1 << boxel_bits) - 1
+        shift += boxel_bits
+        sector = address >> shift & (1 << sector_bits) - 1
+        shift += sector_bits
+        position.append((sector, boxel))
+    cube = 10 << mass_code
+    (sz, bz), (sy, by), (sx, bx) = position
+    return (
+        ORIGIN[0] + sx * SECTOR_SIZE + bx * cube + cube / 2,
+        ORIGIN[1] + sy * SECTOR_SIZE + by * cube + cube / 2,
+        ORIGIN[2] + sz * SECTOR_SIZE + bz * cube + cube / 2,
+        cube / 2 * math.sqrt(3),
+    )
+
+def decode_many(addresses):
+    # Rows of (x, y, z, error), NaN for bad addresses. With numpy the whole batch is decoded
+    # at once and returned as an (n, 4) float array; without it, as a list of tuples.
+    try:
+        import numpy as np
+    except ImportError:
+        return [decode(address) or NAN for address in addresses]
+
+    parsed = [parse_address(address) or 0 for address in addresses]
+    ids = np.asarray(parsed, dtype=np.uint64)
+    mass_code = ids & np.uint64(7)
+    boxel_bits = np.uint64(7) - mass_code
+    shift = np.full(ids.shape, 3, dtype=np.uint64)
+    cube = np.left_shift(np.uint64(10), mass_code).astype(np.float64)
+    out = np.empty((len(parsed), 4))
+    for axis, sector_bits in zip((2, 1, 0), SECTOR_BITS):
+        boxel = (ids >> shift) & ((np.uint64(1) << boxel_bits) - np.uint64(1))
+        shift += boxel_bits
+        sector = (ids >> shift) & np.uint64((1 << sector_bits) - 1)
+        shift += np.uint64(sector_bits)
+        out[:, axis] = ORIGIN[axis] + sector * float(SECTOR_SIZE) + boxel * cube + cube / 2
+    out[:, 3] = cube / 2 * math.sqrt(3)
+    out[ids == 0] = math.nan
+    return out
+
+def distance(a, b):
+    return math.dist(a[:3], b[:3])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Estimate system coordinates from SystemAddress values")
+    parser.add_argument("addresses", nargs="+")
+    args = parser.parse_args()
+
+    for address, (x, y, z, error) in zip(args.addresses, decode_many(args.addresses)):
+        if math.isnan(x):
+            print(f"{address}: not a system address")
+        else:
+            print(f"{address}: {x:.2f}, {y:.2f}, {z:.2f} (±{error:.1f} ly)")
@@ -0,0 +1,46 @@
+import os
+
+READ_CHUNK = 1 << 20
+
+class JournalReader:
+    # Tails one journal file in binary through a persistent handle. A line the
+    # game is still writing stays in self.buffer until its newline arrives.
+    def __init__(self, path, start_at_end=False):
+        self.path = path
+        self.handle = open(path, "rb")
+        if start_at_end:
+            self.handle.seek(0, os.SEEK_END)
+        self.position = self.handle.tell()
+        self.buffer = b""
+
+    def iter_lines(self):
+        if os.fstat(self.handle.fileno()).st_size < self.position:
+            # File was truncated or replaced in place; start over
+            self.handle.seek(0)
+            self.position = 0
+            self.buffer = b""
+
+        while True:
+            data = self.handle.read(READ_CHUNK)
+            if not data:
+                return
+            self.position += len(data)
+            if self.buffer:
+                data = self.buffer + data
+
+            end = data.rfind(b"\n")
+            if end == -1:
+                self.buffer = data
+                continue
+            self.buffer = data[end + 1:]
+
+            start = 0
+            while start <= end:
+                newline = data.find(b"\n", start)
+                line = data[start:newline].strip()
+                start = newline + 1
+                if line:
+                    yield line
+
+    def close(self):
+        self.handle.close()
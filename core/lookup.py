@@ -0,0 +1,307 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading, time
+from core.cache import normalize_name
+from core.metrics import METRICS
+from core.scheduler import priority, PREFETCH, RETRY_STATUSES, RateLimited
+from core.breaker import get_breaker
+from core.bloom import definitely_unknown
+from core.edsm import check_system_on_edsm, check_systems_on_edsm
+from core.edastro import check_system_on_edastro
+
+PROVIDERS = {
+    "edsm": check_system_on_edsm,
+    "edastro": check_system_on_edastro,
+}
+
+# Providers that can resolve a whole list per request; used for route prefetch
+BULK_PROVIDERS = {
+    "edsm": check_systems_on_edsm,
+}
+
+def query_provider(provider, check, system_name, system_address=None):
+    # A provider whose breaker is open answers "offline" straight away instead of
+    # making every lookup wait out its timeout
+    breaker = get_breaker(provider)
+    if not breaker.allow():
+        METRICS.count("ceti_provider_skipped_total", provider=provider)
+        return {"system": system_name, "address": system_address, "provider": provider, "visited": None,
+                "status": "offline", "details": None, "ms": 0, "cached": False}
+
+    start = time.perf_counter()
+    try:
+        visited, details, status = check(system_name)
+    except RateLimited:
+        visited, details, status = None, None, "throttled"
+    except Exception as e:
+        print(f"[Lookup] {provider} failed: {e}")
+        visited, details, status = None, None, None
+    elapsed = (time.perf_counter() - start) * 1000
+    METRICS.observe("ceti_provider_ms", elapsed, provider=provider)
+    # "throttled" means our own scheduler turned the request away, so it says nothing about the provider
+    failed = visited is None or status in RETRY_STATUSES
+    if status != "throttled":
+        breaker.record(not failed)
+    if failed:
+        METRICS.count("ceti_provider_errors_total", provider=provider)
+
+    return {
+        "system": system_name,
+        "address": system_address,
+        "provider": provider,
+        "visited": visited,
+        "status": status,
+        "details": details if isinstance(details, dict) else None,
+        "ms": int(elapsed),
+        "cached": False,
+    }
+
+def verdict(results):
+    # One "visited" is conclusive; "not visited" only counts if every provider answered.
+    # Returns None when the answers can't be trusted (and shouldn't be cached).
+    answers = [None if r.get("status") in RETRY_STATUSES else r["visited"] for r in results.values()]
+    if any(answers):
+        return True
+    if answers and all(a is False for a in answers):
+        return False
+    return None
+
+def summarize(results):
+    # (visited, source) for a set of provider answers: the provider that confirmed the
+    # visit, "filter" for a known-systems filter miss, or every provider that answered when none did
+    if results and all(r["status"] == "filter" for r in results.values()):
+        return False, "filter"
+    visited = verdict(results)
+    if visited:
+        return True, next(provider for provider, r in results.items() if r["visited"])
+    return visited, "+".join(provider for provider, r in results.items() if r["visited"] is not None)
+
+class LookupEngine:
+    # Fans every lookup out to all providers at once; on_result is called from
+    # the worker threads as each provider answers, so the caller must marshal
+    # back to its own thread (see gui.bridge.LookupBridge).
+    #
+    # Lookups in flight are kept in self.inflight by normalized name, so a
+    # repeat target (or a target that route prefetch is already resolving)
+    # joins the existing requests instead of starting new ones.
+    def __init__(self, on_result, cache=None, history=None, max_workers=4, prefetch_workers=2):
+        self.on_result = on_result
+        self.cache = cache
+        self.history = history
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="CETI-lookup")
+        # Route prefetch gets its own small pool so it can never queue ahead of the target lookup
+        self.prefetch_executor = ThreadPoolExecutor(max_workers=prefetch_workers, thread_name_prefix="CETI-prefetch")
+        self.route_generation = 0
+        self.inflight = {}
+        self.lock = threading.Lock()
+
+    def lookup_local(self, system_name, system_address):
+        if self.history is not None:
+            visit = self.history.lookup(system_name, system_address)
+            if visit is not None:
+                # Our own journals already prove the visit; no provider needs asking
+                self.on_result({
+                    "system": system_name,
+                    "address": system_address,
+                    "provider": "history",
+                    "visited": True,
+                    "status": "local",
+                    "ms": 0,
+                    "cached": True,
+                    "details": {"id": None, "coords": visit["coords"]},
+                    "first_visit": visit["first_visit"],
+                })
+                return True
+
+        if self.cache is not None:
+            entry = self.cache.get(system_name, system_address)
+            if entry is not None:
+                # Cache hits are answered synchronously on the caller's thread
+                for provider, result in entry["results"].items():
+                    self.on_result(dict(result, system=system_name, address=system_address,
+                                        provider=provider, ms=0, cached=True))
+                return True
+
+        # Not in the EDSM dump at all, so no provider would know it either
+        if definitely_unknown(system_name):
+            for provider in PROVIDERS:
+                self.on_result({"system": system_name, "address": system_address, "provider": provider,
+                                "visited": False, "status": "filter", "details": None, "ms": 0, "cached": True})
+            return True
+        return False
+
+    def lookup(self, system_name, system_address, skip_local=False):
+        if not skip_local and self.lookup_local(system_name, system_address):
+            return True
+
+        key = normalize_name(system_name)
+        with self.lock:
+            self._cancel_stale(key)
+            pending = self.inflight.get(key)
+            if pending is not None:
+                pending["interactive"] = True
+                already_delivered = list(pending["delivered"])
+                # Route prefetch asks providers one at a time at background priority; every provider
+                # that hasn't answered is asked again here at interactive priority (first answer wins)
+                for provider, check in PROVIDERS.items():
+                    if provider not in pending["results"]:
+                        pending["futures"][provider] = self.executor.submit(self._run_provider, provider, check, pending)
+            else:
+                pending = self._new_pending(key, system_name, system_address, interactive=True)
+                for provider, check in PROVIDERS.items():
+                    pending["futures"][provider] = self.executor.submit(self._run_provider, provider, check, pending)
+                already_delivered = []
+
+        for result in already_delivered:
+            self.on_result(result)
+        return False
+
+    def _new_pending(self, key, system_name, system_address, interactive):
+        pending = {
+            "key": key,
+            "system": system_name,
+            "address": system_address,
+            "interactive": interactive,
+            "results": {},
+            "delivered": [],
+            "futures": {},
+            "stored": False,
+        }
+        self.inflight[key] = pending
+        return pending
+
+    def _cancel_stale(self, current_key):
+        # Called with the lock held. Targets we've moved past lose every request that
+        # hasn't started yet; requests already on the wire finish and are still cached.
+        for key, pending in list(self.inflight.items()):
+            if key != current_key and pending["interactive"] and pending["futures"]:
+                for future in pending["futures"].values():
+                    future.cancel()
+                del self.inflight[key]
+
+    def _run_provider(self, provider, check, pending):
+        self._deliver(pending, self._query_provider(provider, check, pending))
+
+    def _query_provider(self, provider, check, pending):
+        return query_provider(provider, check, pending["system"], pending["address"])
+
+    def _deliver(self, pending, result):
+        with self.lock:
+            if result["provider"] in pending["results"]:
+                return  # a prefetch request that lost the race to the interactive one
+            pending["results"][result["provider"]] = {
+                "visited": result["visited"],
+                "status": result["status"],
+                "details": result["details"],
+            }
+            pending["delivered"].append(result)
+            notify = pending["interactive"]
+            if len(pending["results"]) == len(PROVIDERS) and self.inflight.get(pending["key"]) is pending:
+                del self.inflight[pending["key"]]
+            # The first "visited" settles the lookup, so it's cached without waiting for the rest
+            store = (result["visited"] is True or len(pending["results"]) == len(PROVIDERS)) and not pending["stored"]
+            if store:
+                pending["stored"] = True
+                results = dict(pending["results"])
+
+        if notify:
+            self.on_result(result)
+        if store:
+            self._store(pending, results)
+
+    def _store(self, pending, results):
+        if self.cache is None:
+            return
+        visited = verdict(results)
+        if visited is not None:
+            self.cache.put(pending["system"], pending["address"], visited, results)
+
+    def known_status(self, system_name, system_address):
+        # (visited, source) from history or cache without touching the network, else None
+        if self.history is not None and self.history.lookup(system_name, system_address) is not None:
+            return True, "history"
+        entry = self.cache.get(system_name, system_address, record_stats=False) if self.cache is not None else None
+        if entry is not None:
+            return entry["visited"], "cache"
+        return (False, "filter") if definitely_unknown(system_name) else None
+
+    def prefetch(self, route, on_progress=None, on_hop=None):
+        # Resolve every hop in the background so later FSDTarget events are cache hits.
+        # A newer route bumps the generation and the remaining hops of this one are dropped.
+        # on_hop(generation, index, visited, source) and on_progress(generation, resolved, total)
+        # carry the generation, which is also returned, so a receiver on another thread can
+        # drop answers that were already queued when the next route replaced this one.
+        # Nothing is reported before this returns; the caller shows the initial 0 of N.
+        with self.lock:
+            self.route_generation += 1
+            generation = self.route_generation
+        progress = {"resolved": 0, "total": len(route)}
+
+        def report(index=None, answer=None):
+            if generation != self.route_generation:
+                return
+            with self.lock:
+                progress["resolved"] += 1
+                resolved = progress["resolved"]
+            if on_hop is not None and answer is not None:
+                on_hop(generation, index, *answer)
+            if on_progress is not None:
+                on_progress(generation, resolved, progress["total"])
+
+        def resolve(index, hop, bulk_results):
+            if generation != self.route_generation:
+                return
+            key = normalize_name(hop["name"])
+            with self.lock:
+                if key in self.inflight:
+                    pending = None  # already being looked up; that lookup fills the cache
+                else:
+                    pending = self._new_pending(key, hop["name"], hop["address"], interactive=False)
+
+            answer = None
+            if pending is not None:
+                for provider, check in PROVIDERS.items():
+                    if pending["interactive"]:
+                        break  # the hop was targeted; lookup() has taken over the remaining providers
+                    if hop["name"] in bulk_results.get(provider, {}):
+                        visited, details, status = bulk_results[provider][hop["name"]]
+                        result = dict(system=hop["name"], address=hop["address"], provider=provider,
+                                      visited=visited, status=status, details=details, ms=0, cached=False)
+                    else:
+                        with priority(PREFETCH):
+                            result = self._query_provider(provider, check, pending)
+                    self._deliver(pending, result)
+                    if result["visited"]:
+                        break  # already cached as visited; the other providers can't change that
+                with self.lock:
+                    # A targeted hop finishes through lookup(), which also updates the route panel
+                    if not pending["interactive"]:
+                        if self.inflight.get(key) is pending:
+                            del self.inflight[key]
+                        answer = summarize(pending["results"])
+            report(index, answer)
+
+        def run():
+            unknown = []
+            for index, hop in enumerate(route):
+                answer = self.known_status(hop["name"], hop["address"])
+                if answer is not None:
+                    report(index, answer)
+                else:
+                    unknown.append((index, hop))
+            if not unknown or generation != self.route_generation:
+                return
+
+            # A few bulk requests cover every hop for providers that support it
+            names = [hop["name"] for _, hop in unknown]
+            with priority(PREFETCH):
+                bulk_results = {provider: check_many(names) for provider, check_many in BULK_PROVIDERS.items()}
+            for index, hop in unknown:
+                self.prefetch_executor.submit(resolve, index, hop, bulk_results)
+
+        if route:
+            self.prefetch_executor.submit(run)
+        return generation
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.prefetch_executor.shutdown(wait=False, cancel_futures=True)
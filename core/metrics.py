@@ -0,0 +1,129 @@
+from collections import deque
+import threading, time
+
+LATENCY_BUCKETS_MS = (0.1, 0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+RESERVOIR_SIZE = 2048
+
+def label_key(labels):
+    return tuple(sorted((labels or {}).items()))
+
+def format_labels(key):
+    return "{" + ",".join(f'{k}="{v}"' for k, v in key) + "}" if key else ""
+
+class Histogram:
+    # Cumulative buckets for export plus a bounded window of recent samples for p50/p95/p99
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS_MS)
+        self.count = 0
+        self.total = 0.0
+        self.recent = deque(maxlen=RESERVOIR_SIZE)
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        self.recent.append(value)
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if value <= bound:
+                self.buckets[i] += 1
+                break
+
+    def percentile(self, p):
+        if not self.recent:
+            return None
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+        self.collectors = []
+        self.started = time.time()
+
+    def add_collector(self, collector):
+        # collector() -> [(name, labels, value)], read at export time for state that is a level
+        # rather than an event count (e.g. scheduler tokens). Called without self.lock held,
+        # since collectors take their own locks, which may in turn record metrics.
+        self.collectors.append(collector)
+
+    def gauges(self):
+        values = [(name, label_key(labels), value) for collector in self.collectors for name, labels, value in collector()]
+        return sorted(values, key=lambda gauge: gauge[:2])
+
+    def observe(self, name, value, **labels):
+        key = (name, label_key(labels))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def count(self, name, amount=1, **labels):
+        key = (name, label_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def counter(self, name, **labels):
+        with self.lock:
+            return self.counters.get((name, label_key(labels)), 0)
+
+    def summary_lines(self):
+        # Human-readable view for the tray "Stats" dialog
+        gauges = self.gauges()
+        lines = []
+        with self.lock:
+            for (name, key), histogram in sorted(self.histograms.items()):
+                p50, p95, p99 = (histogram.percentile(p) for p in (50, 95, 99))
+                lines.append(f"{name}{format_labels(key)}: n={histogram.count} "
+                             f"p50={p50:.1f} p95={p95:.1f} p99={p99:.1f} ms")
+            for (name, key), value in sorted(self.counters.items()):
+                lines.append(f"{name}{format_labels(key)}: {value}")
+        lines += [f"{name}{format_labels(key)}: {value:g}" for name, key, value in gauges]
+        return lines
+
+    def to_prometheus(self):
+        gauges = self.gauges()
+        out = []
+        with self.lock:
+            for (name, key), histogram in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, bucket in zip(LATENCY_BUCKETS_MS, histogram.buckets):
+                    cumulative += bucket
+                    out.append(f"{name}_bucket{format_labels(key + (('le', bound),))} {cumulative}")
+                out.append(f"{name}_bucket{format_labels(key + (('le', '+Inf'),))} {histogram.count}")
+                out.append(f"{name}_sum{format_labels(key)} {histogram.total:.3f}")
+                out.append(f"{name}_count{format_labels(key)} {histogram.count}")
+                for p in (50, 95, 99):
+                    out.append(f"{name}_p{p}{format_labels(key)} {histogram.percentile(p):.3f}")
+            for (name, key), value in sorted(self.counters.items()):
+                out.append(f"{name}{format_labels(key)} {value}")
+        out += [f"{name}{format_labels(key)} {value:g}" for name, key, value in gauges]
+        return "\n".join(out) + "\n"
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+
+    def serve(self, port, host="127.0.0.1"):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="CETI-metrics", daemon=True).start()
+        print(f"[Metrics] Serving on http://{host}:{port}/metrics")
+        return server
+
+METRICS = Metrics()
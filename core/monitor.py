@@ -1,83 +1,219 @@
 from PyQt5 import QtCore
-import os, glob, json
+import os, threading, time
+from core.constants import JOURNAL_DIR
+from core.journal import JournalReader
+from core.events import EventDispatcher, loads
+from core.history import parse_visit
+from core.metrics import METRICS
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+class JournalEventHandler(FileSystemEventHandler):
+    # Runs on the watchdog thread; it only records what changed and wakes the monitor
+    def __init__(self, monitor):
+        super().__init__()
+        self.monitor = monitor
+
+    def on_created(self, event):
+        if not event.is_directory and is_journal(event.src_path):
+            self.monitor.journals_changed = True
+            self.monitor.wake.set()
+
+    def on_modified(self, event):
+        if not event.is_directory and is_journal(event.src_path):
+            self.monitor.wake.set()
+
+def is_journal(path):
+    name = os.path.basename(path)
+    return name.startswith("Journal.") and name.endswith(".log")
 
 class JournalMonitor(QtCore.QThread):
     new_targeted_system = QtCore.pyqtSignal(str, str)  
     galmap_opened = QtCore.pyqtSignal()
     galmap_closed = QtCore.pyqtSignal()
+    system_visited = QtCore.pyqtSignal(dict)
+    route_plotted = QtCore.pyqtSignal(list)
+    journal_opened = QtCore.pyqtSignal()
 
-    def __init__(self, poll_interval=1000):
+    def __init__(self, poll_interval=1000, journal_dir=JOURNAL_DIR):
         super().__init__()
         self.poll_interval = poll_interval
+        self.journal_dir = journal_dir
         self.running = False
-        self.last_position = 0
         self.journal_file = None
-        self.start_at_end = True
+        self.reader = None
         self.in_galmap = False
+        self.wake = threading.Event()
+        self.observer = None
+        self.journals_changed = True
+        self.dir_mtime = None
+        self.last_size = None
+        self.last_rescan = 0.0
+
+        self.dispatcher = EventDispatcher()
+        self.dispatcher.subscribe("FSDTarget", self.on_fsd_target)
+        self.dispatcher.subscribe("Music", self.on_music)
+        for event in ("FSDJump", "Location", "CarrierJump", "Scan"):
+            self.dispatcher.subscribe(event, self.on_visit)
+        self.dispatcher.subscribe("NavRoute", self.on_nav_route)
+        self.dispatcher.subscribe("NavRouteClear", lambda entry: self.route_plotted.emit([]))
+        self.last_visited_address = None
 
     def find_latest_journal(self):
-        path = os.path.expanduser("~/Saved Games/Frontier Developments/Elite Dangerous/")
-        journal_files = sorted(glob.glob(os.path.join(path, "Journal.*.log")), key=os.path.getmtime, reverse=True)
-        return journal_files[0] if journal_files else None
+        try:
+            with os.scandir(self.journal_dir) as entries:
+                journals = [e for e in entries if e.is_file() and is_journal(e.name)]
+        except OSError:
+            return None
+        return max(journals, key=lambda e: e.stat().st_mtime).path if journals else None
+
+    def start_watching(self):
+        if Observer is None or not os.path.isdir(self.journal_dir):
+            print("   [JournalMonitor] File events unavailable, polling journal directory")
+            return
+        try:
+            self.observer = Observer()
+            self.observer.schedule(JournalEventHandler(self), self.journal_dir, recursive=False)
+            self.observer.start()
+        except Exception as e:
+            print(f"   [JournalMonitor] File events unavailable ({e}), polling journal directory")
+            self.observer = None
+
+    def check_directory(self):
+        # Without file events, a changed directory mtime is what signals a new journal
+        if self.observer is not None:
+            return
+        try:
+            mtime = os.stat(self.journal_dir).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime != self.dir_mtime:
+            self.dir_mtime = mtime
+            self.journals_changed = True
 
     def run(self):
         self.running = True
+        self.start_watching()
 
         while self.running:
             try:
-                latest = self.find_latest_journal()
-
-                if latest != self.journal_file:
-                    self.journal_file = latest
-                    self.last_position = 0
-                    self.start_at_end = True
-                    if latest:
-                        print(f"   [JournalMonitor] Switched to new journal: {os.path.basename(latest)}")
-                    else:
-                        print("   [JournalMonitor] No journal file found")
-
-                if not self.journal_file or not os.path.exists(self.journal_file):
-                    self.msleep(self.poll_interval)
-                    continue
-
-                with open(self.journal_file, "r", encoding="utf-8") as f:
-                    if self.start_at_end:
-                        f.seek(0, os.SEEK_END)
-                        self.last_position = f.tell()
-                        self.start_at_end = False
-                    else:
-                        f.seek(self.last_position)
-
-                    new_lines = f.readlines()
-                    self.last_position = f.tell()
-
-                for line in new_lines:
-                    try:
-                        entry = json.loads(line)
-                        event = entry.get("event")
-
-                        if event == "FSDTarget" and "Name" in entry:
-                            name = entry["Name"]
-                            raw_address = entry.get("SystemAddress", 0)
-                            system_address = str(raw_address) 
-                            self.new_targeted_system.emit(name, system_address)
-
-                        elif event == "Music":
-                            track = entry.get("MusicTrack", "") # this will always be funny ♫
-                            if track == "GalaxyMap" and not self.in_galmap:
-                                self.in_galmap = True
-                                self.galmap_opened.emit()
-                            elif track != "GalaxyMap" and self.in_galmap:
-                                self.in_galmap = False
-                                self.galmap_closed.emit()
-
-                    except json.JSONDecodeError:
-                        continue
+                self.check_directory()
+                if self.journals_changed:
+                    self.journals_changed = False
+                    self.last_rescan = time.monotonic()
+                    latest = self.find_latest_journal()
+
+                    if latest != self.journal_file:
+                        self.switch_journal(latest)
+
+                if self.reader is not None and self.journal_changed():
+                    self.read_journal()
 
             except Exception as e:
                 print(f"[JournalMonitor] Error: {e}")
 
-            self.msleep(self.poll_interval)
+            # The open journal is stat'ed every poll_interval either way: Windows doesn't reliably
+            # report appends to a file the game keeps open. File events only wake us early and
+            # flag new journals; the directory is still rescanned every 5 intervals as a safety net.
+            self.wake.wait(self.poll_interval / 1000)
+            self.wake.clear()
+            if self.observer is not None and time.monotonic() - self.last_rescan >= self.poll_interval * 5 / 1000:
+                self.journals_changed = True
+
+        if self.observer is not None:
+            self.observer.stop()
+            self.observer.join()
+        if self.reader is not None:
+            self.reader.close()
+
+    def switch_journal(self, path):
+        # Only the journal that is already open at startup is skipped; a journal
+        # created while we run is read from byte 0 so its first events aren't lost
+        first_journal = self.journal_file is None and self.reader is None
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+        self.journal_file = path
+        self.last_size = None
+
+        if path:
+            self.reader = JournalReader(path, start_at_end=first_journal)
+            self.journal_opened.emit()
+            print(f"   [JournalMonitor] Switched to new journal: {os.path.basename(path)}")
+        else:
+            print("   [JournalMonitor] No journal file found")
+
+    def read_journal(self):
+        start = time.perf_counter()
+        dispatch_ms = 0.0
+        for line in self.reader.iter_lines():
+            dispatch_start = time.perf_counter()
+            if self.dispatcher.dispatch(line):
+                elapsed = (time.perf_counter() - dispatch_start) * 1000
+                dispatch_ms += elapsed
+                METRICS.observe("ceti_stage_ms", elapsed, stage="dispatch")
+        METRICS.observe("ceti_stage_ms", (time.perf_counter() - start) * 1000 - dispatch_ms, stage="journal_read")
+
+    def journal_changed(self):
+        try:
+            size = os.stat(self.journal_file).st_size
+        except OSError:
+            self.journals_changed = True
+            return False
+        changed = size != self.last_size
+        self.last_size = size
+        return changed
+
+    def on_fsd_target(self, entry):
+        if "Name" in entry:
+            name = entry["Name"]
+            raw_address = entry.get("SystemAddress", 0)
+            system_address = str(raw_address) 
+            self.new_targeted_system.emit(name, system_address)
+
+    def on_visit(self, entry):
+        # Scan fires many times per system; only report each arrival once
+        visit = parse_visit(entry)
+        if visit is None or visit[0] == self.last_visited_address:
+            return
+        self.last_visited_address = visit[0]
+        address, name, pos, timestamp = visit
+        self.system_visited.emit({"address": address, "name": name, "pos": pos, "timestamp": timestamp})
+
+    def on_nav_route(self, entry):
+        # The journal event only announces the route; the hops are in NavRoute.json
+        route = entry.get("Route") or self.read_nav_route()
+        hops = []
+        for hop in route:
+            if hop.get("StarSystem"):
+                hops.append({"name": hop["StarSystem"], "address": str(hop.get("SystemAddress", 0)), "pos": hop.get("StarPos")})
+        self.route_plotted.emit(hops)
+
+    def read_nav_route(self):
+        path = os.path.join(self.journal_dir, "NavRoute.json")
+        for _ in range(5):  # the game may still be writing it
+            try:
+                with open(path, "rb") as f:
+                    return loads(f.read()).get("Route", [])
+            except (OSError, ValueError):
+                self.msleep(100)
+        print("   [JournalMonitor] Could not read NavRoute.json")
+        return []
+
+    def on_music(self, entry):
+        track = entry.get("MusicTrack", "") # this will always be funny ♫
+        if track == "GalaxyMap" and not self.in_galmap:
+            self.in_galmap = True
+            self.galmap_opened.emit()
+        elif track != "GalaxyMap" and self.in_galmap:
+            self.in_galmap = False
+            self.galmap_closed.emit()
 
     def stop(self):
         self.running = False
+        self.wake.set()
@@ -0,0 +1,165 @@
+from contextlib import contextmanager
+import heapq, itertools, random, threading, time
+from core.metrics import METRICS
+from core.constants import PROVIDER_CONCURRENCY, RATE_LIMIT_RESERVE, BACKOFF_BASE, BACKOFF_MAX, INTERACTIVE_MAX_WAIT
+
+INTERACTIVE, PREFETCH, BATCH = 0, 1, 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", PREFETCH: "prefetch", BATCH: "batch"}
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_local = threading.local()
+_schedulers = {}
+_lock = threading.Lock()
+
+class RateLimited(Exception):
+    pass
+
+@contextmanager
+def priority(level):
+    # Requests made on this thread inside the block are scheduled at `level`;
+    # anything outside one is treated as the interactive target lookup
+    previous = current_priority()
+    _local.priority = level
+    try:
+        yield
+    finally:
+        _local.priority = previous
+
+def current_priority():
+    return getattr(_local, "priority", INTERACTIVE)
+
+def _header_int(headers, name):
+    try:
+        return int(float(headers.get(name)))
+    except (TypeError, ValueError):
+        return None
+
+class ProviderScheduler:
+    # Gates every request to one provider. Waiting requests form a priority queue and
+    # only the head may start, once it has a connection slot and a rate-limit token:
+    #  - the token bucket is reset from x-rate-limit-* headers and refills at the rate
+    #    that would restore the full budget by x-rate-limit-reset;
+    #  - background work keeps one slot and RATE_LIMIT_RESERVE of the budget free, so
+    #    the interactive lookup never queues behind prefetch or batch requests;
+    #  - 429/5xx pause the provider for a jittered exponential backoff (or Retry-After).
+    def __init__(self, provider, concurrency=4):
+        self.provider = provider
+        self.concurrency = concurrency
+        self.cond = threading.Condition()
+        self.waiting = []
+        self.sequence = itertools.count()
+        self.active = 0
+        self.limit = None
+        self.tokens = None
+        self.rate = 0.0
+        self.refilled_at = time.monotonic()
+        self.blocked_until = 0.0
+        self.failures = 0
+
+    def _refill(self, now):
+        if self.tokens is not None and self.rate:
+            self.tokens = min(self.limit, self.tokens + (now - self.refilled_at) * self.rate)
+        self.refilled_at = now
+
+    def _delay(self, level, now):
+        # Seconds until a request at `level` may start; None means wait for a release
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        slots = self.concurrency if level == INTERACTIVE else self.concurrency - 1
+        if self.active >= max(1, slots):
+            return None
+        if self.tokens is not None:
+            needed = 1 if level == INTERACTIVE else 1 + self.limit * RATE_LIMIT_RESERVE
+            if self.tokens < needed:
+                return (needed - self.tokens) / self.rate if self.rate else BACKOFF_MAX
+        return 0
+
+    def acquire(self, level=INTERACTIVE, max_wait=None):
+        start = time.monotonic()
+        ticket = (level, next(self.sequence))
+        with self.cond:
+            heapq.heappush(self.waiting, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    delay = self._delay(level, now) if self.waiting[0] == ticket else None
+                    if delay == 0:
+                        break
+                    if max_wait is not None:
+                        remaining = start + max_wait - now
+                        if remaining <= 0:
+                            METRICS.count("ceti_scheduler_rejected_total", provider=self.provider,
+                                          priority=PRIORITY_NAMES[level])
+                            raise RateLimited(f"no {self.provider} request slot within {max_wait}s")
+                        delay = remaining if delay is None else min(delay, remaining)
+                    self.cond.wait(delay)
+            finally:
+                self.waiting.remove(ticket)
+                heapq.heapify(self.waiting)
+                self.cond.notify_all()
+            self.active += 1
+            if self.tokens is not None:
+                self.tokens -= 1
+        METRICS.observe("ceti_scheduler_wait_ms", (time.monotonic() - start) * 1000,
+                        provider=self.provider, priority=PRIORITY_NAMES[level])
+
+    def release(self, status=None, headers=None):
+        now = time.monotonic()
+        with self.cond:
+            self.active -= 1
+            if headers is not None:
+                limit = _header_int(headers, "x-rate-limit-limit")
+                remaining = _header_int(headers, "x-rate-limit-remaining")
+                reset = _header_int(headers, "x-rate-limit-reset")
+                if limit and remaining is not None:
+                    self.limit, self.tokens, self.refilled_at = limit, remaining, now
+                    if reset:
+                        self.rate = max(limit - remaining, 1) / reset
+
+            if status in RETRY_STATUSES:
+                self.failures += 1
+                retry_after = _header_int(headers or {}, "retry-after")
+                backoff = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (self.failures - 1))
+                delay = retry_after if retry_after is not None else random.uniform(backoff / 2, backoff)
+                self.blocked_until = max(self.blocked_until, now + delay)
+                METRICS.count("ceti_backoff_total", provider=self.provider, status=status)
+            elif status is not None:
+                self.failures = 0
+            self.cond.notify_all()
+
+    def stats(self):
+        with self.cond:
+            self._refill(time.monotonic())
+            return {
+                "active": self.active,
+                "waiting": len(self.waiting),
+                "tokens": None if self.tokens is None else int(self.tokens),
+                "limit": self.limit,
+                "backoff": max(0.0, self.blocked_until - time.monotonic()),
+            }
+
+def get_scheduler(provider):
+    scheduler = _schedulers.get(provider)
+    if scheduler is None:
+        with _lock:
+            scheduler = _schedulers.setdefault(
+                provider, ProviderScheduler(provider, PROVIDER_CONCURRENCY.get(provider, 4)))
+    return scheduler
+
+def scheduler_gauges():
+    # Live slot, token-bucket and backoff state of each provider for Stats and the metrics export
+    gauges = []
+    for provider, scheduler in list(_schedulers.items()):
+        stats = scheduler.stats()
+        for name, value in (("active", stats["active"]), ("waiting", stats["waiting"]), ("tokens", stats["tokens"]),
+                            ("rate_limit", stats["limit"]), ("backoff_seconds", round(stats["backoff"], 3))):
+            if value is not None:
+                gauges.append((f"ceti_scheduler_{name}", {"provider": provider}, value))
+    return gauges
+
+METRICS.add_collector(scheduler_gauges)
+
+def max_wait(level):
+    # The target lookup gives up rather than stall the overlay; background work just waits
+    return INTERACTIVE_MAX_WAIT if level == INTERACTIVE else None
@@ -0,0 +1,164 @@
+# Spansh route import ~ CETI --route neutron-route.csv --out annotated.csv
+# Reads a Spansh route export (CSV, or the JSON the plotters return) as a stream, resolves
+# every system through the batch checker, and writes each row back out with its status.
+# Memory stays flat: rows are read, resolved and written one batch at a time.
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+import csv, json, os, re, sys, time
+from core.batch import BatchChecker
+from core.cache import normalize_name
+
+ROUTE_BATCH_SIZE = 500
+JSON_CHUNK = 1 << 16
+NAME_COLUMNS = ("System Name", "system", "name", "System")
+STATUS_COLUMNS = ("CETI Visited", "CETI Source")
+ARRAY_OF_OBJECTS = re.compile(r"\[\s*\{")
+
+def iter_json_array(stream, chunk_size=JSON_CHUNK):
+    # Yields the objects of the first array of objects in the document (Spansh's
+    # system_jumps / result list) without loading the whole file
+    decoder = json.JSONDecoder()
+    buffer = ""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            return
+        buffer += chunk
+        match = ARRAY_OF_OBJECTS.search(buffer)
+        if match:
+            buffer = buffer[match.start() + 1:]
+            break
+        buffer = buffer[-256:]  # an opening bracket may straddle two chunks
+
+    pos = 0
+    while True:
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+        if pos == len(buffer):
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                return
+            buffer, pos = buffer[pos:] + chunk, 0
+            continue
+        if buffer[pos] == "]":
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                raise
+            buffer, pos = buffer[pos:] + chunk, 0
+            continue
+        yield item
+        pos = end
+        if pos > chunk_size:
+            buffer, pos = buffer[pos:], 0
+
+def system_name(row):
+    for column in NAME_COLUMNS:
+        value = row.get(column)
+        if isinstance(value, str) and value.strip():
+            return value.strip()
+    return None
+
+def record_source(record):
+    # The provider that confirmed the visit, or "cache"/"history" for local answers
+    if record["source"] != "network":
+        return record["source"]
+    providers = record["providers"]
+    confirmed = [provider for provider, r in providers.items() if r["visited"]]
+    return confirmed[0] if confirmed else "+".join(p for p, r in providers.items() if r["visited"] is not None)
+
+def open_route(path):
+    # Returns (stream, fieldnames, rows); fieldnames is None for JSON until the first row is seen
+    stream = open(path, encoding="utf-8-sig", newline="")
+    head = stream.read(64).lstrip()[:1]
+    stream.seek(0)
+    if head and head in "[{":
+        return stream, None, iter_json_array(stream)
+    reader = csv.DictReader(stream)
+    return stream, reader.fieldnames, reader
+
+class RouteWriter:
+    # CSV keeps the input's columns plus the CETI ones; anything else is written as JSON lines
+    def __init__(self, path, fieldnames):
+        self.as_csv = path.lower().endswith(".csv")
+        self.stream = open(path, "w", encoding="utf-8", newline="")
+        self.fieldnames = fieldnames
+        self.writer = None
+
+    def write(self, row, visited, source):
+        if not self.as_csv:
+            self.stream.write(json.dumps(dict(row, ceti_visited=visited, ceti_source=source)) + "\n")
+            return
+        if self.writer is None:
+            fieldnames = self.fieldnames or [k for k, v in row.items() if not isinstance(v, (list, dict))]
+            self.writer = csv.DictWriter(self.stream, fieldnames=list(fieldnames) + list(STATUS_COLUMNS),
+                                         extrasaction="ignore")
+            self.writer.writeheader()
+        status = {True: "Visited", False: "Not visited"}.get(visited, "Unknown")
+        self.writer.writerow(dict(row, **dict(zip(STATUS_COLUMNS, (status, source.upper())))))
+
+    def close(self):
+        self.stream.close()
+
+def default_output(path):
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.ceti{'.csv' if ext.lower() == '.csv' else '.jsonl'}"
+
+def annotate_route(path, out_path=None, cache=None, history=None, workers=8, batch_size=ROUTE_BATCH_SIZE):
+    out_path = out_path or default_output(path)
+    checker = BatchChecker(cache=cache, history=history, workers=workers)
+    stream, fieldnames, rows = open_route(path)
+    writer = RouteWriter(out_path, fieldnames)
+    totals = {"rows": 0, "systems": 0, "visited": 0, "not_visited": 0, "unknown": 0, "skipped": 0}
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="CETI-route") as pool:
+            for batch in iter(lambda: list(islice(rows, batch_size)), []):
+                # Road-to-riches exports repeat a system once per body; resolve each name once
+                names = list(dict.fromkeys(name for name in map(system_name, batch) if name))
+                answers = {}
+                for record in checker.resolve(pool, names):
+                    answers[normalize_name(record["system"])] = record
+                    totals["systems"] += 1
+                    key = {True: "visited", False: "not_visited"}.get(record["visited"], "unknown")
+                    totals[key] += 1
+
+                for row in batch:
+                    name = system_name(row)
+                    record = answers.get(normalize_name(name)) if name else None
+                    if record is None:
+                        totals["skipped"] += 1
+                        writer.write(row, None, "")
+                        continue
+                    writer.write(row, record["visited"], record_source(record))
+                totals["rows"] += len(batch)
+
+                elapsed = time.perf_counter() - start
+                print(f"[Route] {totals['rows']:,} rows, {totals['systems']:,} systems "
+                      f"({totals['rows'] / elapsed if elapsed else 0:,.0f} rows/s)", file=sys.stderr)
+    finally:
+        stream.close()
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"[Route] Done: {totals['rows']:,} rows in {elapsed:.1f}s -> {out_path} | {totals['visited']:,} visited, "
+          f"{totals['not_visited']:,} not visited, {totals['unknown']:,} unknown systems", file=sys.stderr)
+    return totals
+
+def run_route(path, out_path=None, workers=8, use_cache=True):
+    from core.cache import StatusCache
+    from core.history import VisitHistory
+    from core import client
+
+    cache = StatusCache() if use_cache else None
+    history = VisitHistory() if use_cache else None
+    try:
+        return annotate_route(path, out_path, cache=cache, history=history, workers=workers)
+    finally:
+        client.close_all()
+        for store in (cache, history):
+            if store is not None:
+                store.close()
@@ -0,0 +1,50 @@
+import math
+from core.galaxy import COORD_SCALE
+
+GALAXY_EXTENT = 70000  # ly; no search ever needs to grow past this
+INITIAL_HALF_WIDTH = 25
+
+class SpatialIndex:
+    # k-nearest and radius queries over the galaxy database's R*Tree. Every system in
+    # it came from the EDSM dump, so all results are systems known to (visited per) EDSM.
+    def __init__(self, galaxy):
+        self.galaxy = galaxy
+
+    def _candidates(self, x, y, z, half_width, radius):
+        # (distance, row) for every system in the cube that lies within `radius`, nearest first;
+        # rows stay plain tuples, since a sparse region can mean a very large cube
+        origin = (x, y, z)
+        found = []
+        for row in self.galaxy.query_box(
+            x - half_width, x + half_width, y - half_width, y + half_width, z - half_width, z + half_width
+        ):
+            distance = math.dist(origin, (row[3] / COORD_SCALE, row[4] / COORD_SCALE, row[5] / COORD_SCALE))
+            if distance <= radius:
+                found.append((distance, row))
+        found.sort(key=lambda found_row: found_row[0])
+        return found
+
+    def _system(self, distance, row):
+        id64, name, edsm_id, sx, sy, sz = row
+        return {
+            "id64": id64,
+            "name": name,
+            "edsm_id": edsm_id,
+            "coords": (sx / COORD_SCALE, sy / COORD_SCALE, sz / COORD_SCALE),
+            "distance": distance,
+        }
+
+    def within(self, x, y, z, radius, limit=None):
+        found = self._candidates(x, y, z, radius, radius)
+        return [self._system(*found_row) for found_row in (found[:limit] if limit else found)]
+
+    def nearest(self, x, y, z, k=10, max_radius=None):
+        # Grow a cube until it holds k systems inside its inscribed sphere; anything
+        # outside that sphere could still be beaten by a system outside the cube.
+        max_radius = max_radius or GALAXY_EXTENT
+        half_width = min(INITIAL_HALF_WIDTH, max_radius)
+        while True:
+            found = self._candidates(x, y, z, half_width, min(half_width, max_radius))
+            if len(found) >= k or half_width >= max_radius:
+                return [self._system(*found_row) for found_row in found[:k]]
+            half_width = min(half_width * 2, max_radius)
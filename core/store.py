@@ -0,0 +1,216 @@
+import csv, json, os, queue, sqlite3, tempfile, threading, time
+from core.cache import normalize_name
+from core.constants import CONFIG_FILE, SAVED_SYSTEMS_DB_FILE, SAVE_FLUSH_INTERVAL
+
+DEFAULT_CONFIG = {
+    "bg_color": "#371e09",
+    "border_color": "#ff7a00",
+    "text_color": "white",
+    "map_visibility": True,
+    "width": 350,
+    "height": 160,
+}
+
+def load_config(path=CONFIG_FILE):
+    config = dict(DEFAULT_CONFIG)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            config.update(json.load(f))
+    except (OSError, ValueError):
+        pass
+    return config
+
+def save_config(config, path=CONFIG_FILE):
+    # Write a temp file beside the real one and swap it in, so a crash never leaves half a config
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=".CETI_config.", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(config, f, indent=2)
+        os.replace(temp_path, path)
+    except OSError:
+        os.unlink(temp_path)
+        raise
+
+def parse_xyz(xyz):
+    try:
+        x, y, z = (float(p.strip()) for p in xyz.split(","))
+        return x, y, z
+    except ValueError:
+        return None
+
+class SavedSystemStore:
+    # Append-mostly SQLite store for saved systems; one row per system, keyed by normalized name
+    def __init__(self, path=SAVED_SYSTEMS_DB_FILE):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=FULL")  # writes arrive batched from SaveWriter, so fsync per commit is cheap
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS saved_systems (
+                name_key TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                status TEXT,
+                time_saved TEXT,
+                edsm_link TEXT,
+                x REAL, y REAL, z REAL,
+                xyz_error REAL
+            )
+        """)
+        # xyz_error is the error bound (ly) of coordinates estimated from a SystemAddress; NULL when exact
+        columns = [row[1] for row in self.db.execute("PRAGMA table_info(saved_systems)")]
+        if "xyz_error" not in columns:
+            self.db.execute("ALTER TABLE saved_systems ADD COLUMN xyz_error REAL")
+        self.db.commit()
+
+    def add_many(self, rows):
+        # rows: (name, status, time_saved, edsm_link, coords-or-None); coords are (x, y, z),
+        # or (x, y, z, error) for an estimate
+        params = []
+        for name, status, time_saved, edsm_link, coords in rows:
+            x, y, z, error = (tuple(coords) + (None,))[:4] if coords else (None, None, None, None)
+            params.append((normalize_name(name), name, status, time_saved, edsm_link, x, y, z, error or None))
+        with self.lock:
+            with self.db:
+                self.db.executemany("""
+                    INSERT INTO saved_systems (name_key, name, status, time_saved, edsm_link, x, y, z, xyz_error)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (name_key) DO UPDATE SET
+                        status = excluded.status,
+                        time_saved = excluded.time_saved,
+                        edsm_link = excluded.edsm_link,
+                        x = coalesce(excluded.x, x),
+                        y = coalesce(excluded.y, y),
+                        z = coalesce(excluded.z, z),
+                        xyz_error = CASE WHEN excluded.x IS NULL THEN xyz_error ELSE excluded.xyz_error END
+                """, params)
+
+    def add(self, name, status, time_saved, edsm_link, coords):
+        self.add_many([(name, status, time_saved, edsm_link, coords)])
+
+    def get(self, name):
+        with self.lock:
+            row = self.db.execute(
+                "SELECT name, status, time_saved, edsm_link, x, y, z, xyz_error FROM saved_systems WHERE name_key = ?",
+                (normalize_name(name),)
+            ).fetchone()
+        if row is None:
+            return None
+        name, status, time_saved, edsm_link, x, y, z, xyz_error = row
+        return {
+            "name": name,
+            "status": status,
+            "time_saved": time_saved,
+            "edsm_link": edsm_link,
+            "coords": (x, y, z) if x is not None else None,
+            "coords_error": xyz_error,
+        }
+
+    def count(self):
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM saved_systems").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+class SaveWriter(threading.Thread):
+    # Background writer for the save button: rows are queued instantly and written
+    # in one transaction every SAVE_FLUSH_INTERVAL seconds. A row queued without
+    # coordinates gets them from resolve_coords (e.g. EDSM) here, off the GUI thread.
+    def __init__(self, store, resolve_coords=None, flush_interval=SAVE_FLUSH_INTERVAL):
+        super().__init__(name="CETI-save-writer", daemon=True)
+        self.store = store
+        self.resolve_coords = resolve_coords
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue()
+        self.start()
+
+    def enqueue(self, name, status, time_saved, edsm_link, coords):
+        self.queue.put((name, status, time_saved, edsm_link, coords))
+
+    def run(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0, deadline - time.monotonic())
+            try:
+                row = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                row = False
+
+            if row is None:  # close()
+                if batch:
+                    self.write(batch)
+                return
+            if row:
+                batch.append(row)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            if batch and (time.monotonic() >= deadline or len(batch) >= 500):
+                self.write(batch)
+                batch = []
+                deadline = None
+
+    def write(self, batch):
+        rows = []
+        for name, status, time_saved, edsm_link, coords in batch:
+            if coords is None and self.resolve_coords is not None:
+                coords = self.resolve_coords(name)
+            rows.append((name, status, time_saved, edsm_link, coords))
+        try:
+            self.store.add_many(rows)
+            print(f"[Store] Saved {len(rows)} system(s)")
+        except sqlite3.Error as e:
+            print(f"[Store] Failed to save systems: {e}")
+
+    def close(self):
+        self.queue.put(None)
+        self.join()
+
+def migrate_csv_config(csv_path, config_path=CONFIG_FILE, max_rows=10):
+    # Row 2 of a pre-1.6 CETI CSV held the overlay settings; it becomes the config file
+    # unless one already exists. Only the first rows are read, so this is cheap enough to
+    # run before the overlay loads its config; the saved systems follow in migrate_csv.
+    if os.path.isfile(config_path):
+        return False
+    with open(csv_path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        next(reader, None)  # header
+        for _, row in zip(range(max_rows), reader):
+            if len(row) < 9 or row[0]:
+                continue
+            config = dict(DEFAULT_CONFIG)
+            config["bg_color"] = row[5] or config["bg_color"]
+            config["border_color"] = row[6] or config["border_color"]
+            config["text_color"] = row[7] or config["text_color"]
+            config["map_visibility"] = row[8].lower() == "true"
+            if len(row) >= 11 and row[9].isdigit() and row[10].isdigit():
+                config["width"], config["height"] = int(row[9]), int(row[10])
+            save_config(config, config_path)
+            return True
+    return False
+
+def migrate_csv(csv_path, store, batch_size=5000):
+    # Streams the saved systems of a pre-1.6 CETI CSV into the store (settings rows are skipped)
+    batch = []
+    migrated = 0
+    with open(csv_path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        next(reader, None)  # header
+        for row in reader:
+            if len(row) < 5 or not row[0]:
+                continue
+            batch.append((row[0], row[1], row[2], row[3], parse_xyz(row[4])))
+            if len(batch) >= batch_size:
+                store.add_many(batch)
+                migrated += len(batch)
+                batch = []
+    if batch:
+        store.add_many(batch)
+        migrated += len(batch)
+
+    os.replace(csv_path, csv_path + ".migrated")
+    print(f"[Store] Migrated {migrated} saved systems from {os.path.basename(csv_path)}")
+    return migrated
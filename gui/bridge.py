@@ -0,0 +1,16 @@
+from PyQt5 import QtCore
+
+class LookupBridge(QtCore.QObject):
+    # Emitted from LookupEngine worker threads; Qt queues it onto the GUI thread.
+    provider_result = QtCore.pyqtSignal(dict)
+    prefetch_progress = QtCore.pyqtSignal(int, int, int)
+    prefetch_hop = QtCore.pyqtSignal(int, int, object, str)
+
+    def emit_result(self, result):
+        self.provider_result.emit(result)
+
+    def emit_progress(self, generation, resolved, total):
+        self.prefetch_progress.emit(generation, resolved, total)
+
+    def emit_hop(self, generation, index, visited, source):
+        self.prefetch_hop.emit(generation, index, visited, source)
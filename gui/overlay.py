@@ -1,9 +1,24 @@
 from PyQt5 import QtWidgets, QtGui, QtCore
 from datetime import datetime
-import webbrowser, csv, requests, os
-from core.constants import EDSM_SYSTEM_URL, SPHERE_SYSTEMS_API_URL, EDASTRO_API_URL,VERSION, GITHUB_LINK
+import math, os, threading
+from core import client
+from core.galaxy import get_galaxy
+from core.store import SavedSystemStore, SaveWriter, load_config, save_config, migrate_csv, migrate_csv_config
+from core.edsm import get_system_coords
+from core.metrics import METRICS
+from core.breaker import breaker_states
+from core.spatial import SpatialIndex
+from core.id64 import distance
+from gui.route_view import RouteModel, RouteWindow
+from core.constants import EDSM_SYSTEM_URL, SPHERE_SYSTEMS_API_URL, SPHERE_SYSTEMS_TIMEOUT, EDASTRO_API_URL,VERSION, GITHUB_LINK, NEARBY_RESULTS, NEARBY_RADIUS, LEGACY_CSV_FILE, METRICS_FILE
+
+def open_url(url):
+    import webbrowser  # only needed once a link is clicked
+    webbrowser.open_new_tab(url)
 
 class Overlay(QtWidgets.QWidget):
+    nearby_found = QtCore.pyqtSignal(dict)
+
     def __init__(self):
         super().__init__()
         self.visibility_tied_to_map = True  
@@ -21,6 +36,15 @@ class Overlay(QtWidgets.QWidget):
         restore_action = tray_menu.addAction("Show CETI")
         restore_action.triggered.connect(self.show_overlay_from_tray)
 
+        route_action = tray_menu.addAction("Route")
+        route_action.triggered.connect(self.toggle_route_view)
+
+        stats_action = tray_menu.addAction("Stats")
+        stats_action.triggered.connect(self.show_stats)
+
+        export_action = tray_menu.addAction("Export Metrics")
+        export_action.triggered.connect(self.export_metrics)
+
         exit_action = tray_menu.addAction("Exit")
         exit_action.triggered.connect(QtWidgets.qApp.quit)
 
@@ -36,60 +60,36 @@ class Overlay(QtWidgets.QWidget):
 
         # State variables
         self.system_id = None
+        self.system_coords = None
+        self.system_estimate = None
+        self.position = None
         self.visited = False
         self.last_displayed_system = "N/A"
         self.last_displayed_status = "Not visited"
         self.current_timing = ""
         self.loading_active = False
         self.settings_open = False
-
-        # CSV config and data
-        self.bg_color = "#371e09"
-        self.border_color = "#ff7a00"
-        self.text_color = "white"
-        self.csv_file = f"CETI{VERSION}_saved_systems.csv"
-        file_exists = os.path.isfile(self.csv_file)
-        expected_header = [
-            "System Name", "Status", "Time Saved", "EDSM Link", "XYZ",
-            "BackgroundColor", "BorderColor", "TextColor", "MapVisibility",
-            "Width", "Height"
-        ]
-
-        config_loaded = False
-
-        if file_exists and os.stat(self.csv_file).st_size > 0:
-            with open(self.csv_file, "r", encoding="utf-8", newline="") as f:
-                reader = csv.reader(f)
-                rows = list(reader)
-                if rows and rows[0] == expected_header: 
-                    if len(rows) > 1:
-                        config_row = rows[1]
-                        if len(config_row) >= 12:
-                            self.bg_color = config_row[5] or self.bg_color
-                            self.border_color = config_row[6] or self.border_color
-                            self.text_color = config_row[7] or self.text_color
-                            self.visibility_tied_to_map = config_row[8].lower() == "true"
-                            try:
-                                self.resize(int(config_row[10]), int(config_row[11]))
-                            except ValueError:
-                                pass
-
-        if not file_exists:
-            with open(self.csv_file, "w", encoding="utf-8", newline="") as f:
-                writer = csv.writer(f)
-                writer.writerow(expected_header)
-                writer.writerow([
-                    "", "", "", "", "",
-                    self.bg_color, self.border_color, self.text_color,
-                    str(self.visibility_tied_to_map),
-                    str(self.width()), str(self.height())
-                ])
-
-
-
-
-        self.csv_file_handle = open(self.csv_file, mode="a", newline="", encoding="utf-8")
-        self.csv_writer = csv.writer(self.csv_file_handle)
+        self.nearby_busy = False
+        self.nearby_found.connect(self.on_nearby_found)
+
+        # Route panel is built on first use; the model is filled whenever a route is plotted
+        self.route_model = RouteModel(self)
+        self.route_generation = 0
+        self.route_window = None
+
+        # Config and saved systems
+        self.store = None
+        self.save_writer = None
+
+        # The legacy CSV's settings row is read now; its saved systems wait for init_store
+        if os.path.isfile(LEGACY_CSV_FILE):
+            migrate_csv_config(LEGACY_CSV_FILE)
+        config = load_config()
+        self.bg_color = config["bg_color"]
+        self.border_color = config["border_color"]
+        self.text_color = config["text_color"]
+        self.visibility_tied_to_map = config["map_visibility"]
+        self.resize(config["width"], config["height"])
         self.apply_style()
 
         # Layouts and Widgets
@@ -119,6 +119,21 @@ class Overlay(QtWidgets.QWidget):
         self.system_label.setStyleSheet("font-weight: bold; font-size: 14pt;")
         layout.addWidget(self.system_label)
 
+        self.route_label = QtWidgets.QLabel("")
+        self.route_label.setAlignment(QtCore.Qt.AlignCenter)
+        self.route_label.setStyleSheet("font-size: 8pt; color: #aaa; border: none;")
+        self.route_label.setCursor(QtCore.Qt.PointingHandCursor)
+        self.route_label.setToolTip("Show every jump of the route")
+        self.route_label.mousePressEvent = lambda event: self.toggle_route_view()
+        self.route_label.hide()
+        layout.addWidget(self.route_label)
+
+        self.health_label = QtWidgets.QLabel("")
+        self.health_label.setAlignment(QtCore.Qt.AlignCenter)
+        self.health_label.setStyleSheet("font-size: 8pt; color: #d80; border: none;")
+        self.health_label.hide()
+        layout.addWidget(self.health_label)
+
         button_layout = QtWidgets.QHBoxLayout()
         button_size = QtCore.QSize(80, 28)
 
@@ -129,7 +144,7 @@ class Overlay(QtWidgets.QWidget):
         self.save_button = QtWidgets.QPushButton("💾")
         self.save_button.setFixedSize(button_size)
         self.save_button.setEnabled(False)
-        self.save_button.clicked.connect(self.save_to_csv)
+        self.save_button.clicked.connect(self.save_system)
 
         self.find_button = QtWidgets.QPushButton("Nearby")
         self.find_button.setFixedSize(button_size)
@@ -151,6 +166,21 @@ class Overlay(QtWidgets.QWidget):
         button_layout.addWidget(self.edsm_button)
         layout.addLayout(button_layout)
 
+    def init_store(self):
+        # Deferred until after first paint; a CSV migration can take a while
+        if self.store is not None:
+            return
+        self.store = SavedSystemStore()
+        if os.path.isfile(LEGACY_CSV_FILE):
+            migrate_csv(LEGACY_CSV_FILE, self.store)
+        self.save_writer = SaveWriter(self.store, resolve_coords=get_system_coords)
+
+    def close_store(self):
+        if self.save_writer is not None:
+            self.save_writer.close()
+        if self.store is not None:
+            self.store.close()
+
     def handle_tray_click(self, reason):
             if reason == QtWidgets.QSystemTrayIcon.Trigger:
                 if self.isVisible():
@@ -158,6 +188,19 @@ class Overlay(QtWidgets.QWidget):
                 else:
                     self.show_overlay_from_tray()
 
+    def show_stats(self):
+        lines = METRICS.summary_lines()
+        lines += [f"{provider.upper()} breaker: {state}" for provider, state in breaker_states().items()]
+        QtWidgets.QMessageBox.information(self, f"CETI {VERSION} Stats", "\n".join(lines) if lines else "No lookups yet.")
+
+    def export_metrics(self):
+        try:
+            METRICS.write(METRICS_FILE)
+            self.tray_icon.showMessage("CETI Metrics", f"Metrics written to {os.path.abspath(METRICS_FILE)}",
+                                       QtWidgets.QSystemTrayIcon.Information, 4000)
+        except OSError as e:
+            QtWidgets.QMessageBox.critical(self, "Error", str(e))
+
     def show_overlay_from_tray(self):
         self.show()
         self.raise_()
@@ -225,41 +268,30 @@ class Overlay(QtWidgets.QWidget):
         dlg.exec_()
         self.settings_open = False
 
-    def save_to_csv(self):
+    def save_system(self):
         system_name = self.last_displayed_system
         status = self.last_displayed_status
         time_saved = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         edsm_link = "N/A"
-        xyz_str = ""
+        coords = None
 
+        # (x, y, z, error): the lookup's coordinates, else the boxel centre from the address,
+        # saved with its error bound so estimates can be told apart from exact positions
+        target = self.target_coords()
         if self.visited:
-            try:
-                response = requests.get(f"https://www.edsm.net/api-v1/system?systemName={system_name}&showCoordinates=1")
-                if response.status_code == 200:
-                    data = response.json()
-                    if "coords" in data:
-                        coords = data["coords"]
-                        x, y, z = coords.get("x"), coords.get("y"), coords.get("z")
-                        xyz_str = f"{x}, {y}, {z}"
-                        edsm_link = f"https://www.edsm.net/en/system?systemName={system_name.replace(' ', '%20')}"
-            except Exception as e:
-                print(f"[Save] Failed to fetch coords: {e}")
+            # With neither, the writer asks EDSM in the background
+            coords = target
+            edsm_link = EDSM_SYSTEM_URL.format(system_name.replace(' ', '%20'))
         else:
-            coords = self.get_xyz_coords_dialog()
+            # Only a target without an address still needs typed coordinates
+            coords = target or self.get_xyz_coords_dialog()
             if coords is None:
                 return
-            x, y, z = coords
-            xyz_str = f"{x}, {y}, {z}"
 
-        self.csv_writer.writerow([system_name, status, time_saved, edsm_link, xyz_str, "", "", "", ""])
-        self.csv_file_handle.flush()
-        print(f"System details saved to {self.csv_file}")
+        self.init_store()
+        self.save_writer.enqueue(system_name, status, time_saved, edsm_link, coords)
         self.save_button.setStyleSheet("color: white; background-color: #0a0; border: 2px solid #ff7a00;")
 
-
-
-
-
     def get_xyz_coords_dialog(self):
         dialog = QtWidgets.QDialog(self)
         dialog.setWindowFlags(QtCore.Qt.Tool | QtCore.Qt.WindowStaysOnTopHint | QtCore.Qt.FramelessWindowHint)
@@ -299,33 +331,15 @@ class Overlay(QtWidgets.QWidget):
         return None
 
 
-    def save_config_to_csv(self):
-        with open(self.csv_file, "r", encoding="utf-8", newline="") as f:
-            rows = list(csv.reader(f))
-
-        if len(rows) < 2:
-            rows = [
-                ["System Name", "Status", "Time Saved", "EDSM Link", "XYZ",
-                "BackgroundColor", "BorderColor", "TextColor", "MapVisibility", "Width", "Height"],
-                ["", "", "", "", "", self.bg_color, self.border_color, self.text_color,
-                str(self.visibility_tied_to_map), str(self.width()), str(self.height())]
-            ]
-
-        else:
-            if len(rows[1]) < 12:
-                rows[1] += [""] * (12 - len(rows[1]))
-            rows[1][5:11] = [
-                self.bg_color,
-                self.border_color,
-                self.text_color,
-                str(self.visibility_tied_to_map),
-                str(self.width()),
-                str(self.height())
-            ]
-
-        with open(self.csv_file, "w", encoding="utf-8", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerows(rows)
+    def save_config(self):
+        save_config({
+            "bg_color": self.bg_color,
+            "border_color": self.border_color,
+            "text_color": self.text_color,
+            "map_visibility": self.visibility_tied_to_map,
+            "width": self.width(),
+            "height": self.height(),
+        })
 
 
     def update_colors(self, bg_color, border_color, text_color):
@@ -333,7 +347,7 @@ class Overlay(QtWidgets.QWidget):
         self.border_color = border_color
         self.text_color = text_color
         self.apply_style()
-        self.save_config_to_csv()
+        self.save_config()
 
 
     def toggle_visibility(self):
@@ -344,15 +358,20 @@ class Overlay(QtWidgets.QWidget):
         else:
             self.hide()
 
-    def update_display(self, system_name, visited, system_id, timing_info=None, urls=None):
+    def update_display(self, system_name, visited, system_id, timing_info=None, urls=None, coords=None, estimate=None):
         display_name = system_name if len(system_name) <= 64 else "N/A"
         self.visited = visited
         self.system_id = system_id
+        self.system_coords = tuple(coords) if coords else None
+        self.system_estimate = estimate
         self.last_displayed_system = display_name
         self.last_displayed_status = "Visited" if visited else "Not visited"
         self.current_urls = urls or {}
+        if self.route_window is not None and self.route_window.isVisible():
+            self.route_window.select_system(system_name)
 
         base_text = f"<div>System: {display_name}<br>Status: {self.last_displayed_status}</div>"
+        timing_info = " · ".join(filter(None, (self.format_distance(), timing_info)))
         timing_text = f"<div style='text-align: center; font-size: 8pt; color: #aaa;'>{timing_info}</div>" if timing_info else ""
         self.system_label.setText(base_text + timing_text)
 
@@ -364,6 +383,62 @@ class Overlay(QtWidgets.QWidget):
         self.save_button.setStyleSheet("background-color: none;")
         self.edsm_button.setStyleSheet("color: white; background-color: #0a0;" if web_enabled else "color: white; background-color: #a00;")
 
+    def target_coords(self):
+        # (x, y, z, error): exact when a provider returned coordinates, else decoded from the address
+        if self.system_coords:
+            return (*self.system_coords, 0.0)
+        return self.system_estimate
+
+    def set_position(self, position):
+        self.position = position
+
+    def format_distance(self):
+        target = self.target_coords()
+        if not target or not self.position:
+            return ""
+        ly = distance(self.position, target)
+        error = target[3] + (self.position[3] if len(self.position) > 3 else 0)
+        return f"{ly:,.2f} ly away" if not error else f"~{ly:,.0f} ly away (±{error:.0f})"
+
+    def update_route_progress(self, generation, resolved, total):
+        if generation != self.route_generation:
+            return
+        if total == 0:
+            self.route_label.hide()
+            return
+        status = "ready" if resolved >= total else "prefetching"
+        self.route_label.setText(f"Route: {resolved} of {total} resolved ({status})")
+        self.route_label.show()
+
+    def set_route(self, route, generation):
+        self.route_generation = generation
+        self.route_model.set_route(route)
+        self.update_route_progress(generation, 0, len(route))
+
+    def update_route_hop(self, generation, index, visited, source):
+        # Hops queued before the route was replaced belong to the old route's row numbers
+        if generation == self.route_generation:
+            self.route_model.set_status(index, visited, source)
+
+    def toggle_route_view(self):
+        if self.route_window is None:
+            self.route_window = RouteWindow(self, self.route_model)
+            self.route_window.system_activated.connect(lambda name: open_url(EDSM_SYSTEM_URL.format(name)))
+        if self.route_window.isVisible():
+            self.route_window.hide()
+        else:
+            self.route_window.show()
+            self.route_window.raise_()
+            self.route_window.select_system(self.last_displayed_system)
+
+    def update_provider_health(self, states):
+        offline = [provider.upper() for provider, state in states.items() if state != "closed"]
+        if not offline:
+            self.health_label.hide()
+            return
+        self.health_label.setText(f"{', '.join(offline)} not responding, skipped for now")
+        self.health_label.show()
+
     def show_web_menu(self):
         if not self.current_urls:
             return
@@ -372,15 +447,15 @@ class Overlay(QtWidgets.QWidget):
 
         if "edsm" in self.current_urls and self.current_urls["edsm"]:
             edsm_action = menu.addAction("Open in EDSM")
-            edsm_action.triggered.connect(lambda: webbrowser.open_new_tab(self.current_urls["edsm"]))
+            edsm_action.triggered.connect(lambda: open_url(self.current_urls["edsm"]))
 
         if "edastro" in self.current_urls and self.current_urls["edastro"]:
             edastro_action = menu.addAction("Open in Edastro")
-            edastro_action.triggered.connect(lambda: webbrowser.open_new_tab(self.current_urls["edastro"]))
+            edastro_action.triggered.connect(lambda: open_url(self.current_urls["edastro"]))
 
         if "spansh" in self.current_urls and self.current_urls["spansh"]:
             spansh_action = menu.addAction("Open in Spansh")
-            spansh_action.triggered.connect(lambda: webbrowser.open_new_tab(self.current_urls["spansh"]))
+            spansh_action.triggered.connect(lambda: open_url(self.current_urls["spansh"]))
 
         if menu.isEmpty():
             return
@@ -391,15 +466,15 @@ class Overlay(QtWidgets.QWidget):
     def open_edsm(self):
         if self.last_displayed_system:
             url = EDSM_SYSTEM_URL.format(self.last_displayed_system)
-            webbrowser.open_new_tab(url)
+            open_url(url)
 
     def open_edastro(self):
         if self.last_displayed_system:
             url = EDASTRO_API_URL.format(self.last_displayed_system)
-            webbrowser.open_new_tab(url)
+            open_url(url)
 
 
-    def get_coords_and_radius(self):
+    def get_coords_and_radius(self, max_radius=200, prefill=None):
         dialog = QtWidgets.QDialog(self)
         dialog._drag_pos = None
 
@@ -430,7 +505,15 @@ class Overlay(QtWidgets.QWidget):
         layout.addLayout(title_layout)
 
         input_field = QtWidgets.QLineEdit()
-        input_field.setPlaceholderText("X,Y,Z, Radius(1-200ly) (e.g., 0,0,0,10)")
+        if max_radius:
+            input_field.setPlaceholderText(f"X,Y,Z, Radius(1-{max_radius}ly) (e.g., 0,0,0,10)")
+        else:
+            input_field.setPlaceholderText("X,Y,Z, Radius(ly) (e.g., 0,0,0,500)")
+        if prefill:
+            # Start from the target; an estimated position gets a radius that covers its boxel
+            x, y, z, error = prefill
+            radius = min(max_radius or NEARBY_RADIUS, max(NEARBY_RADIUS, math.ceil(error)))
+            input_field.setText(f"{x:.2f}, {y:.2f}, {z:.2f}, {radius}")
         layout.addWidget(input_field)
 
         button_box = QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.Ok)
@@ -444,8 +527,11 @@ class Overlay(QtWidgets.QWidget):
                 if len(parts) != 4:
                     raise ValueError("Expected 4 values")
                 x, y, z, radius = parts
-                if not (1 <= radius <= 200):
-                    QtWidgets.QMessageBox.warning(self, "Invalid Radius", "Radius must be between 1 and 200.")
+                if max_radius and not (1 <= radius <= max_radius):
+                    QtWidgets.QMessageBox.warning(self, "Invalid Radius", f"Radius must be between 1 and {max_radius}.")
+                    return None
+                if radius <= 0:
+                    QtWidgets.QMessageBox.warning(self, "Invalid Radius", "Radius must be positive.")
                     return None
                 return (x, y, z, radius)
             except ValueError:
@@ -454,69 +540,102 @@ class Overlay(QtWidgets.QWidget):
         return None
 
     def find_nearby_system(self):
+        if self.nearby_busy:
+            return
+        galaxy = get_galaxy()
+        # The local index has no radius limit; the Sphere Systems API caps it at 200 ly
+        coords = self.get_coords_and_radius(max_radius=None if galaxy else 200, prefill=self.target_coords())
+        if not coords:
+            return
+        self.nearby_busy = True
+        self.find_button.setText("...")
+        threading.Thread(target=self.search_nearby, args=(galaxy, *coords), name="CETI-nearby", daemon=True).start()
+
+    def search_nearby(self, galaxy, x, y, z, radius):
+        # Worker thread: a large radius in a sparse region scans a big cube of the database,
+        # and the Sphere Systems API can take seconds; the result comes back via nearby_found
         try:
-            coords = self.get_coords_and_radius()
-            if not coords:
-                return
-            x, y, z, radius = coords
             start_time = datetime.now()
-            response = requests.get(SPHERE_SYSTEMS_API_URL.format(x, y, z, radius))
+            if galaxy is not None:
+                nearby = SpatialIndex(galaxy).nearest(x, y, z, k=NEARBY_RESULTS, max_radius=radius)
+                source = "Local"
+            else:
+                response = client.get("edsm", SPHERE_SYSTEMS_API_URL.format(x, y, z, radius), timeout=SPHERE_SYSTEMS_TIMEOUT)
+                data = response.json() if response.status_code == 200 else None
+                nearby = sorted(data or [], key=lambda s: s.get("distance", float('inf')))[:NEARBY_RESULTS]
+                source = f"Response {response.status_code}"
+
             elapsed = datetime.now() - start_time
             ms = int(elapsed.total_seconds() * 1000)
-
-            if response.status_code == 200 and response.json():
-                nearest = sorted(response.json(), key=lambda s: s.get("distance", float('inf')))[0]
-                system_id = nearest.get("id")
-                system_name = nearest.get("name")
-                distance = nearest.get("distance")
-
-                dialog = QtWidgets.QDialog(self)
-                dialog._drag_pos = None
-
-                def mousePressEvent(event):
-                    if event.button() == QtCore.Qt.LeftButton:
-                        dialog._drag_pos = event.globalPos() - dialog.frameGeometry().topLeft()
-                        event.accept()
-
-                def mouseMoveEvent(event):
-                    if event.buttons() == QtCore.Qt.LeftButton and dialog._drag_pos:
-                        dialog.move(event.globalPos() - dialog._drag_pos)
-                        event.accept()
-
-                dialog.mousePressEvent = mousePressEvent
-                dialog.mouseMoveEvent = mouseMoveEvent
-
-                dialog.setWindowFlags(QtCore.Qt.Window | QtCore.Qt.WindowStaysOnTopHint | QtCore.Qt.FramelessWindowHint)
-                layout = QtWidgets.QVBoxLayout(dialog)
-
-                title_layout = QtWidgets.QHBoxLayout()
-                title = QtWidgets.QLabel("Nearest Visited System")
-                close_button = QtWidgets.QPushButton("X")
-                close_button.setFixedSize(24, 24)
-                close_button.clicked.connect(dialog.reject)
-                title_layout.addWidget(title)
-                title_layout.addStretch()
-                title_layout.addWidget(close_button)
-                layout.addLayout(title_layout)
-
-                layout.addWidget(QtWidgets.QLabel(f"Reference System: {self.last_displayed_system}"))
-                layout.addWidget(QtWidgets.QLabel(f"User Input: X={x}, Y={y}, Z={z}"))
-                layout.addWidget(QtWidgets.QLabel(f"Search Radius: {radius} LY"))
-                layout.addWidget(QtWidgets.QLabel(f"Nearest Visited: {system_name}"))
-                layout.addWidget(QtWidgets.QLabel(f"Distance: {distance:.2f} LY"))
-                layout.addWidget(QtWidgets.QLabel(f"Response {response.status_code} : {ms} ms"))
-
-                open_button = QtWidgets.QPushButton("Open in EDSM")
-                open_button.setStyleSheet("color: white; background-color: #0a0; border: 2px solid #ff7a00;")
-                open_button.clicked.connect(lambda: webbrowser.open_new_tab(EDSM_SYSTEM_URL.format(system_id, system_name)))
-                layout.addWidget(open_button)
-
-                dialog.exec_()
-                return
-            else:
-                QtWidgets.QMessageBox.warning(self, "No Result", "No nearby systems found and/or Sphere Systems API down. (WIP)")
+            self.nearby_found.emit({"nearby": nearby, "search": (x, y, z, radius), "timing": f"{source} : {ms} ms"})
         except Exception as e:
-            QtWidgets.QMessageBox.critical(self, "Error", str(e))
+            self.nearby_found.emit({"error": str(e)})
+
+    def on_nearby_found(self, result):
+        self.nearby_busy = False
+        self.find_button.setText("Nearby")
+        if "error" in result:
+            QtWidgets.QMessageBox.critical(self, "Error", result["error"])
+        elif result["nearby"]:
+            self.show_nearby_results(result["nearby"], *result["search"], result["timing"])
+        else:
+            QtWidgets.QMessageBox.warning(self, "No Result", "No nearby systems found and/or Sphere Systems API down. (WIP)")
+
+    def show_nearby_results(self, nearby, x, y, z, radius, timing):
+        dialog = QtWidgets.QDialog(self)
+        dialog._drag_pos = None
+
+        def mousePressEvent(event):
+            if event.button() == QtCore.Qt.LeftButton:
+                dialog._drag_pos = event.globalPos() - dialog.frameGeometry().topLeft()
+                event.accept()
+
+        def mouseMoveEvent(event):
+            if event.buttons() == QtCore.Qt.LeftButton and dialog._drag_pos:
+                dialog.move(event.globalPos() - dialog._drag_pos)
+                event.accept()
+
+        dialog.mousePressEvent = mousePressEvent
+        dialog.mouseMoveEvent = mouseMoveEvent
+
+        dialog.setWindowFlags(QtCore.Qt.Window | QtCore.Qt.WindowStaysOnTopHint | QtCore.Qt.FramelessWindowHint)
+        layout = QtWidgets.QVBoxLayout(dialog)
+
+        title_layout = QtWidgets.QHBoxLayout()
+        title = QtWidgets.QLabel("Nearest Visited Systems")
+        close_button = QtWidgets.QPushButton("X")
+        close_button.setFixedSize(24, 24)
+        close_button.clicked.connect(dialog.reject)
+        title_layout.addWidget(title)
+        title_layout.addStretch()
+        title_layout.addWidget(close_button)
+        layout.addLayout(title_layout)
+
+        layout.addWidget(QtWidgets.QLabel(f"Reference System: {self.last_displayed_system}"))
+        layout.addWidget(QtWidgets.QLabel(f"User Input: X={x}, Y={y}, Z={z}"))
+        layout.addWidget(QtWidgets.QLabel(f"Search Radius: {radius} LY"))
+
+        result_list = QtWidgets.QListWidget()
+        for rank, system in enumerate(nearby, 1):
+            item = QtWidgets.QListWidgetItem(f"{rank}. {system.get('name')} - {system.get('distance', 0):.2f} LY")
+            item.setData(QtCore.Qt.UserRole, system.get("name"))
+            result_list.addItem(item)
+        result_list.setCurrentRow(0)
+        layout.addWidget(result_list)
+        layout.addWidget(QtWidgets.QLabel(timing))
+
+        def open_selected():
+            item = result_list.currentItem()
+            if item is not None:
+                open_url(EDSM_SYSTEM_URL.format(item.data(QtCore.Qt.UserRole)))
+
+        open_button = QtWidgets.QPushButton("Open in EDSM")
+        open_button.setStyleSheet("color: white; background-color: #0a0; border: 2px solid #ff7a00;")
+        open_button.clicked.connect(open_selected)
+        result_list.itemDoubleClicked.connect(lambda _: open_selected())
+        layout.addWidget(open_button)
+
+        dialog.exec_()
 
 class SettingsDialog(QtWidgets.QDialog):
     color_changed = QtCore.pyqtSignal(str, str, str)
@@ -533,7 +652,7 @@ class SettingsDialog(QtWidgets.QDialog):
         title.setStyleSheet("font-weight: bold; font-size: 12pt;")
         gh_button = QtWidgets.QPushButton("GH")
         gh_button.setFixedSize(32, 24)
-        gh_button.clicked.connect(lambda: webbrowser.open_new_tab(f"{GITHUB_LINK}"))
+        gh_button.clicked.connect(lambda: open_url(f"{GITHUB_LINK}"))
         reset_button = QtWidgets.QPushButton("R")
         reset_button.setFixedSize(24, 24)
         reset_button.setToolTip("Reset to default settings")
@@ -623,7 +742,7 @@ class SettingsDialog(QtWidgets.QDialog):
 
     def toggle_map_mode(self, state, parent):
         parent.visibility_tied_to_map = bool(state)
-        parent.save_config_to_csv()
+        parent.save_config()
 
 
     def reset_defaults(self):
@@ -649,7 +768,7 @@ class SettingsDialog(QtWidgets.QDialog):
 
         self.parent().resize(default_width, default_height)
         self.parent().visibility_tied_to_map = default_map_only
-        self.parent().save_config_to_csv()
+        self.parent().save_config()
 
 
     def pick_bg_color(self):
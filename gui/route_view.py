@@ -0,0 +1,180 @@
+from PyQt5 import QtWidgets, QtGui, QtCore
+import math
+from core.cache import normalize_name
+
+VISITED_COLOR = QtGui.QColor("#0c0")
+NOT_VISITED_COLOR = QtGui.QColor("#e33")
+PENDING_COLOR = QtGui.QColor("#888")
+
+class RouteModel(QtCore.QAbstractTableModel):
+    # One row per hop of the plotted route. Only the rows on screen are ever painted, and
+    # status updates are coalesced into a single dataChanged per flush, so routes with
+    # thousands of hops stay responsive while prefetch answers stream in.
+    COLUMNS = ("#", "System", "Status", "Jump", "Source")
+    FLUSH_MS = 100
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.hops = []
+        self.rows_by_key = {}
+        self.resolved = 0
+        self.visited = 0
+        self.dirty = None
+        self.flush_timer = QtCore.QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.timeout.connect(self.flush)
+
+    def set_route(self, route):
+        self.beginResetModel()
+        self.hops = []
+        self.rows_by_key = {}
+        previous = None
+        for hop in route:
+            pos = hop.get("pos")
+            jump = math.dist(previous, pos) if previous and pos else None
+            previous = pos or None
+            self.rows_by_key.setdefault(normalize_name(hop["name"]), len(self.hops))
+            self.hops.append({"name": hop["name"], "jump": jump, "visited": None, "source": "", "done": False})
+        self.resolved = self.visited = 0
+        self.dirty = None
+        self.endResetModel()
+
+    def set_status(self, row, visited, source):
+        if not 0 <= row < len(self.hops):
+            return
+        hop = self.hops[row]
+        if hop["done"]:
+            self.visited -= hop["visited"] is True
+        else:
+            self.resolved += 1
+        hop.update(visited=visited, source=source, done=True)
+        self.visited += visited is True
+        self.dirty = (min(row, self.dirty[0]), max(row, self.dirty[1])) if self.dirty else (row, row)
+        if not self.flush_timer.isActive():
+            self.flush_timer.start(self.FLUSH_MS)
+
+    def update_system(self, system_name, visited, source):
+        row = self.rows_by_key.get(normalize_name(system_name))
+        if row is not None:
+            self.set_status(row, visited, source)
+        return row
+
+    def row_for(self, system_name):
+        return self.rows_by_key.get(normalize_name(system_name))
+
+    def flush(self):
+        if self.dirty is None:
+            return
+        first, last = self.dirty
+        self.dirty = None
+        self.dataChanged.emit(self.index(first, 2), self.index(last, len(self.COLUMNS) - 1))
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.hops)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            return self.COLUMNS[section]
+        return None
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        hop = self.hops[index.row()]
+        column = index.column()
+
+        if role == QtCore.Qt.DisplayRole:
+            if column == 0:
+                return index.row()
+            if column == 1:
+                return hop["name"]
+            if column == 2:
+                if not hop["done"]:
+                    return "..."
+                return {True: "Visited", False: "Not visited"}.get(hop["visited"], "Unknown")
+            if column == 3:
+                return f"{hop['jump']:.2f} ly" if hop["jump"] is not None else ""
+            if column == 4:
+                return hop["source"].upper()
+        elif role == QtCore.Qt.ForegroundRole and column == 2:
+            if not hop["done"] or hop["visited"] is None:
+                return PENDING_COLOR
+            return VISITED_COLOR if hop["visited"] else NOT_VISITED_COLOR
+        elif role == QtCore.Qt.TextAlignmentRole and column in (0, 3):
+            return int(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+        return None
+
+class RouteWindow(QtWidgets.QDialog):
+    system_activated = QtCore.pyqtSignal(str)
+
+    def __init__(self, parent, model):
+        super().__init__(parent)
+        self._drag_pos = None
+        self.model = model
+        self.setWindowFlags(QtCore.Qt.Window | QtCore.Qt.WindowStaysOnTopHint | QtCore.Qt.FramelessWindowHint)
+        self.resize(460, 420)
+        layout = QtWidgets.QVBoxLayout(self)
+
+        title_layout = QtWidgets.QHBoxLayout()
+        title = QtWidgets.QLabel("Route")
+        title.setStyleSheet("font-weight: bold; font-size: 12pt;")
+        close_button = QtWidgets.QPushButton("X")
+        close_button.setFixedSize(24, 24)
+        close_button.clicked.connect(self.hide)
+        title_layout.addWidget(title)
+        title_layout.addStretch()
+        title_layout.addWidget(close_button)
+        layout.addLayout(title_layout)
+
+        self.summary_label = QtWidgets.QLabel("")
+        self.summary_label.setStyleSheet("font-size: 8pt; color: #aaa; border: none;")
+        layout.addWidget(self.summary_label)
+
+        self.table = QtWidgets.QTableView()
+        self.table.setModel(model)
+        self.table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
+        self.table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.table.setWordWrap(False)
+        self.table.setShowGrid(False)
+        self.table.verticalHeader().hide()
+        # Fixed row heights let the view skip measuring rows it isn't showing
+        self.table.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(20)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(QtWidgets.QHeaderView.Interactive)
+        header.setSectionResizeMode(1, QtWidgets.QHeaderView.Stretch)
+        for column, width in ((0, 44), (2, 80), (3, 70), (4, 70)):
+            self.table.setColumnWidth(column, width)
+        self.table.doubleClicked.connect(lambda index: self.system_activated.emit(model.hops[index.row()]["name"]))
+        layout.addWidget(self.table)
+
+        model.modelReset.connect(self.update_summary)
+        model.dataChanged.connect(self.update_summary)
+        self.update_summary()
+
+    def update_summary(self, *args):
+        total = len(self.model.hops)
+        if not total:
+            self.summary_label.setText("No route plotted")
+            return
+        self.summary_label.setText(f"{total:,} jumps · {self.model.resolved:,} resolved · {self.model.visited:,} visited")
+
+    def select_system(self, system_name):
+        row = self.model.row_for(system_name)
+        if row is not None:
+            self.table.selectRow(row)
+            self.table.scrollTo(self.model.index(row, 0), QtWidgets.QAbstractItemView.PositionAtCenter)
+
+    def mousePressEvent(self, event):
+        if event.button() == QtCore.Qt.LeftButton:
+            self._drag_pos = event.globalPos() - self.frameGeometry().topLeft()
+            event.accept()
+
+    def mouseMoveEvent(self, event):
+        if event.buttons() == QtCore.Qt.LeftButton and self._drag_pos:
+            self.move(event.globalPos() - self._drag_pos)
+            event.accept()